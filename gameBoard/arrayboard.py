@@ -0,0 +1,293 @@
+"""
+arrayboard.py
+
+Optional NumPy backend that runs the rules on a stack of N boards of one
+size at once. The stack is held as two [N, H, W] arrays:
+
+    cells   int8 cell codes, as in codec: 0 empty, 1 - 8 pieces
+            a b c d A B C D, 9 sink, 10 obstacle, 11 extension
+    ids     int32 identifier each cell carries: its own index for an
+            anchor, the identifier written in it for an extension and
+            -1 elsewhere
+
+Gravity, sinks and moves act on every board with array operations and
+follow MoveExecutor exactly, so a batch can be turned back into
+GameStates at any point. Nothing else in the game needs NumPy; this
+module raises ImportError when it is used without it.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from codec import CELL_CODES, CELL_VALUES, EXTENSION_BASE
+from gameBoard import GameState
+from movegen import DIRECTIONS
+from movetable import PATH_LENGTHS, PIECE_TYPES, SHAPES, STEPS
+
+EMPTY = 0
+SINK = CELL_CODES['s']
+OBSTACLE = CELL_CODES['x']
+EXTENSION = EXTENSION_BASE
+NO_ID = -1
+
+# Codes 1 - 4 are light pieces, 5 - 8 dark; the type is (code - 1) % 4
+FIRST_PIECE = CELL_CODES['a']
+LAST_PIECE = CELL_CODES['D']
+LAST_LIGHT = CELL_CODES['d']
+
+# Row and column step of each direction, in DIRECTIONS order
+ROW_STEPS = [STEPS[direction][0] for direction in DIRECTIONS]
+COL_STEPS = [STEPS[direction][1] for direction in DIRECTIONS]
+
+# Extension offsets from the anchor per type and orientation, padded to three
+EXTENSION_OFFSETS = [[list(SHAPES[kind][lying][1:]) + [(0, 0)] * (4 - len(SHAPES[kind][lying]))
+                      for lying in (0, 1)]
+                     for kind in PIECE_TYPES]
+EXTENSION_COUNTS = [[len(SHAPES[kind][lying]) - 1 for lying in (0, 1)] for kind in PIECE_TYPES]
+
+# Empty cells a move needs ahead of the anchor per type, orientation and direction
+REQUIRED_PATHS = [[[PATH_LENGTHS[kind][direction][lying] for direction in DIRECTIONS]
+                   for lying in (0, 1)]
+                  for kind in PIECE_TYPES]
+LONGEST_PATH = max(max(lengths) for paths in PATH_LENGTHS.values() for lengths in paths.values())
+
+
+def require_numpy():
+    """Raise ImportError if NumPy is not installed"""
+    if np is None:
+        raise ImportError("arrayboard needs NumPy: pip install numpy")
+
+
+def encode_board(board):
+    """Return the cells and ids arrays of a string grid"""
+    require_numpy()
+    width = len(board[0])
+    cells = []
+    ids = []
+    for row, values in enumerate(board):
+        for col, value in enumerate(values):
+            code = CELL_CODES.get(value)
+            if code is None:
+                cells.append(EXTENSION)
+                ids.append(int(value))
+            else:
+                cells.append(code)
+                ids.append(row * width + col if FIRST_PIECE <= code <= LAST_PIECE else NO_ID)
+    shape = (len(board), width)
+    return (np.array(cells, dtype=np.int8).reshape(shape),
+            np.array(ids, dtype=np.int32).reshape(shape))
+
+
+def decode_board(cells, ids):
+    """Return the string grid for one board's cells and ids arrays"""
+    board = []
+    for codes, identifiers in zip(cells.tolist(), ids.tolist()):
+        board.append([CELL_VALUES[code] if code < EXTENSION else str(identifier)
+                      for code, identifier in zip(codes, identifiers)])
+    return board
+
+
+class BoardBatch:
+    """A stack of boards of one size with their sink counters and side to move"""
+
+    def __init__(self, cells, ids, light_sunk=None, dark_sunk=None, dark_to_move=None):
+        require_numpy()
+        self.cells = cells
+        self.ids = ids
+        self.count, self.height, self.width = cells.shape
+        zeros = np.zeros(self.count, dtype=np.int32)
+        self.light_sunk = zeros.copy() if light_sunk is None else light_sunk
+        self.dark_sunk = zeros.copy() if dark_sunk is None else dark_sunk
+        self.dark_to_move = zeros.astype(bool) if dark_to_move is None else dark_to_move
+
+    @classmethod
+    def from_states(cls, states):
+        """Stack the boards of GameStates that share a size"""
+        require_numpy()
+        encoded = [encode_board(state.board) for state in states]
+        return cls(np.stack([cells for cells, _ in encoded]),
+                   np.stack([ids for _, ids in encoded]),
+                   np.array([state.light_sinked_pieces for state in states], dtype=np.int32),
+                   np.array([state.dark_sinked_pieces for state in states], dtype=np.int32),
+                   np.array([state.current_player == 'dark' for state in states]))
+
+    def to_states(self):
+        """Return a GameState for every board"""
+        states = []
+        for n in range(self.count):
+            game_state = GameState(self.height, self.width)
+            game_state.board[:] = decode_board(self.cells[n], self.ids[n])
+            game_state.bits.load()
+            game_state.current_player = 'dark' if self.dark_to_move[n] else 'light'
+            game_state.light_sinked_pieces = int(self.light_sunk[n])
+            game_state.dark_sinked_pieces = int(self.dark_sunk[n])
+            states.append(game_state)
+        return states
+
+    def anchors(self):
+        """Mask of every piece anchor"""
+        return (self.cells >= FIRST_PIECE) & (self.cells <= LAST_PIECE)
+
+    def lying(self):
+        """Mask of the anchors of pieces lying on their side.
+
+        As PieceTable.is_upright, a piece lies when a cell right of or
+        below its anchor is an extension carrying its identifier.
+        """
+        cells = self.cells
+        ids = self.ids
+        index = np.arange(self.height * self.width, dtype=np.int32).reshape(self.height, self.width)
+        lying = np.zeros(cells.shape, dtype=bool)
+        lying[:, :, :-1] = (cells[:, :, 1:] == EXTENSION) & (ids[:, :, 1:] == index[:, :-1])
+        lying[:, :-1] |= (cells[:, 1:] == EXTENSION) & (ids[:, 1:] == index[:-1])
+        return lying & self.anchors() & (cells != CELL_CODES['a']) & (cells != CELL_CODES['A'])
+
+    def legal_moves(self, to_move=False):
+        """Return the [N, H, W, 4] mask of legal moves, directions in 'lrud' order.
+
+        Entry [n, row, col, d] is true exactly when is_valid_move(row,
+        col, DIRECTIONS[d]) accepts the move on board n. With to_move,
+        only the pieces of the side to move on each board can move.
+        """
+        cells = self.cells
+        height, width = self.height, self.width
+        anchors = self.anchors()
+        if to_move:
+            dark = cells > LAST_LIGHT
+            anchors &= dark == self.dark_to_move[:, None, None]
+
+        # Empty cells in a straight line from each cell, counted up to the longest path
+        pad = LONGEST_PATH
+        empty = np.zeros((self.count, height + 2 * pad, width + 2 * pad), dtype=bool)
+        empty[:, pad:pad + height, pad:pad + width] = cells == EMPTY
+        runs = np.zeros(cells.shape + (len(DIRECTIONS),), dtype=np.int8)
+        for d, direction in enumerate(DIRECTIONS):
+            row_step, col_step = STEPS[direction]
+            clear = np.ones(cells.shape, dtype=bool)
+            for step in range(1, pad + 1):
+                top = pad + row_step * step
+                left = pad + col_step * step
+                clear &= empty[:, top:top + height, left:left + width]
+                runs[..., d] += clear
+
+        kind = (cells.astype(np.intp) - FIRST_PIECE) % len(PIECE_TYPES)
+        required = np.asarray(REQUIRED_PATHS, dtype=np.int8)[kind, self.lying().astype(np.intp)]
+        return anchors[..., None] & (runs >= required)
+
+    def apply_gravity(self, boards=None):
+        """Drop every anchor onto the nearest occupied cell below it.
+
+        Each column is compacted on its own: cells that are occupied but
+        not anchors stay put, and the anchors between two of them slide
+        down together in order, as MoveExecutor.apply_gravity settles
+        them from the floor up. boards optionally masks the boards to
+        settle.
+        """
+        cells = self.cells
+        height = self.height
+        anchors = self.anchors()
+        fixed = (cells != EMPTY) & ~anchors
+        if boards is not None:
+            anchors &= boards[:, None, None]
+
+        rows = np.arange(height, dtype=np.int32)[None, :, None]
+        floor_row = np.full((self.count, 1, self.width), height, dtype=np.int32)
+        # Row of the nearest fixed cell strictly below each cell, or height for the floor
+        fixed_rows = np.where(fixed, rows, height)
+        floor = np.minimum.accumulate(fixed_rows[:, ::-1], axis=1)[:, ::-1]
+        floor = np.concatenate([floor[:, 1:], floor_row], axis=1)
+        # Anchors at or below each row, with an empty row under the board
+        counts = np.cumsum(anchors[:, ::-1], axis=1, dtype=np.int32)[:, ::-1]
+        counts = np.concatenate([counts, np.zeros_like(floor_row)], axis=1)
+        between = counts[:, 1:] - np.take_along_axis(counts, floor, axis=1)
+        target = floor - 1 - between
+
+        batch, row, col = np.nonzero(anchors)
+        new_row = target[batch, row, col]
+        moved = new_row != row
+        batch, row, col, new_row = batch[moved], row[moved], col[moved], new_row[moved]
+        values = cells[batch, row, col]
+        # Clear every old cell before writing, as a piece may land where another was
+        cells[batch, row, col] = EMPTY
+        self.ids[batch, row, col] = NO_ID
+        cells[batch, new_row, col] = values
+        self.ids[batch, new_row, col] = new_row * self.width + col
+
+    def check_sinks(self, boards=None):
+        """Capture every anchor resting on the cell directly above a sink"""
+        cells = self.cells
+        captured = np.zeros(cells.shape, dtype=bool)
+        captured[:, :-1] = self.anchors()[:, :-1] & (cells[:, 1:] == SINK)
+        if boards is not None:
+            captured &= boards[:, None, None]
+
+        light = captured & (cells <= LAST_LIGHT)
+        self.light_sunk += light.sum(axis=(1, 2), dtype=np.int32)
+        self.dark_sunk += (captured & ~light).sum(axis=(1, 2), dtype=np.int32)
+        cells[captured] = EMPTY
+        self.ids[captured] = NO_ID
+
+    def settle(self, boards=None):
+        """Apply gravity, then sinks"""
+        self.apply_gravity(boards)
+        self.check_sinks(boards)
+
+    def apply_moves(self, rows, cols, directions):
+        """Execute a move on every board and settle it, as MoveExecutor.make_move.
+
+        rows, cols and directions hold one entry per board, or a single
+        value for every board; directions index 'lrud'. Moves should be
+        legal, as is_valid_move checks. A board with no piece at the
+        square, or whose piece would leave the board, is left as it was.
+        Returns the mask of boards that moved.
+        """
+        count, height, width = self.cells.shape
+        cells = self.cells
+        ids = self.ids
+        batch = np.arange(count)
+        rows = np.broadcast_to(np.asarray(rows, dtype=np.intp), (count,))
+        cols = np.broadcast_to(np.asarray(cols, dtype=np.intp), (count,))
+        directions = np.broadcast_to(np.asarray(directions, dtype=np.intp), (count,))
+
+        inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        row = np.where(inside, rows, 0)
+        col = np.where(inside, cols, 0)
+        piece = cells[batch, row, col]
+        is_anchor = inside & (piece >= FIRST_PIECE) & (piece <= LAST_PIECE)
+        kind = (piece.astype(np.intp) - FIRST_PIECE) % len(PIECE_TYPES)
+        identifier = row * width + col
+
+        lying = self.lying()[batch, row, col].astype(np.intp)
+
+        new_row = row + np.asarray(ROW_STEPS)[directions]
+        new_col = col + np.asarray(COL_STEPS)[directions]
+        offsets = np.asarray(EXTENSION_OFFSETS)[kind, lying]
+        extension_rows = new_row[:, None] + offsets[:, :, 0]
+        extension_cols = new_col[:, None] + offsets[:, :, 1]
+        extensions = np.arange(3) < np.asarray(EXTENSION_COUNTS)[kind, lying][:, None]
+
+        fits = (new_row >= 0) & (new_row < height) & (new_col >= 0) & (new_col < width)
+        fits &= np.all(~extensions | ((extension_rows >= 0) & (extension_rows < height)
+                                      & (extension_cols >= 0) & (extension_cols < width)), axis=1)
+        applied = is_anchor & fits
+
+        # Clear the piece and every cell carrying its identifier; a small piece has only its anchor
+        cleared = (ids == identifier[:, None, None]) & applied[:, None, None]
+        cleared &= ~((kind == 0)[:, None, None] & (cells == EXTENSION))
+        cells[cleared] = EMPTY
+        ids[cleared] = NO_ID
+
+        moved = batch[applied]
+        new_identifier = (new_row * width + new_col).astype(np.int32)
+        cells[moved, new_row[applied], new_col[applied]] = piece[applied]
+        ids[moved, new_row[applied], new_col[applied]] = new_identifier[applied]
+        extensions &= applied[:, None]
+        extension_batch = np.broadcast_to(batch[:, None], extensions.shape)[extensions]
+        cells[extension_batch, extension_rows[extensions], extension_cols[extensions]] = EXTENSION
+        ids[extension_batch, extension_rows[extensions], extension_cols[extensions]] = (
+            np.broadcast_to(new_identifier[:, None], extensions.shape)[extensions])
+
+        self.settle(applied)
+        return applied
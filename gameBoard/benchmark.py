@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Benchmarks
+Usage: python benchmark.py suite [--save FILE] [--compare FILE] [--threshold T]
+       python benchmark.py scaling [--sizes 16 32 ...] [--moves N] [--seed S]
+       python benchmark.py imports [--modules gameBoard ...] [--runs N]
+
+suite times the rules engine piece by piece: move validation per piece
+type, move execution with gravity and sinks, board setup parsing, board
+rendering and whole random games on small and larger boards. Every entry
+reports microseconds per operation. Given a saved suite result with
+--compare, entries slower than the baseline by more than the threshold
+are listed as regressions and the exit status is 1.
+
+scaling plays random moves on square boards of growing size, each laid
+out with the same number of pieces, and reports the mean time per move
+spent validating, generating and executing moves. With rule checks whose
+cost does not depend on board area, the per-move figures stay flat as
+boards grow. Move table entries for a cell are built the first time a
+piece moves from it; that one-off cost is left out of the timings.
+
+imports starts a fresh interpreter per run for each module and reports
+the mean time to import it over the interpreter's own start-up time, and
+whether the import pulled in tkinter.
+
+Results are written as JSON.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+from codec import decode_state, encode_state
+from engine import playable_moves
+from gameBoard import BORDER_WIDTH, BoardPrinter, BoardReader, GameState
+from movegen import decode_move, generate_move_array
+from simulate import SimulationConfig, play_game
+
+DEFAULT_SIZES = [16, 32, 64, 128, 256]
+DEFAULT_MODULES = ['gameBoard', 'engine', 'gameBoardGUI']
+GAME_SIZES = [8, 9, 10, 16, 32]
+DEFAULT_THRESHOLD = 0.10
+
+
+def scaled_setup(height, width, pieces=4, seed=0):
+    """Setup lines for a board of any size with a fixed number of pieces per side.
+
+    Sinks go along the floor, pieces and as many obstacles on a spaced
+    grid in the interior. Boards smaller than 16x16 have no room for the
+    grid, so they get as many small pieces as their interior holds.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for col in range(0, width, max(1, width // 4)):
+        lines.append(f"s 1 {height - 1} {col}")
+
+    inner = BORDER_WIDTH
+    cells = [(row, col)
+             for row in range(inner, height - inner, 2)
+             for col in range(inner, width - inner, 3)]
+    kinds = 'abcd'
+    if len(cells) < 3 * pieces:
+        cells = [(row, col)
+                 for row in range(inner, height - inner)
+                 for col in range(inner, width - inner)]
+        kinds = 'a'
+        pieces = min(pieces, len(cells) // 2)
+    rng.shuffle(cells)
+    for row, col in cells[2 * pieces:3 * pieces]:
+        lines.append(f"x {row} {col}")
+    # Pieces are laid out as they are read, so list them from the floor up
+    # to let a piece with another right below it lie on its side
+    placed = [(row, col, 'l' if n % 2 == 0 else 'd', kinds[(n // 2) % len(kinds)])
+              for n, (row, col) in enumerate(cells[:2 * pieces])]
+    for row, col, side, kind in sorted(placed, key=lambda piece: (-piece[0], piece[1])):
+        lines.append(f"{side} {kind} {row} {col}")
+    lines.append('#')
+    return lines
+
+
+def time_moves(height, width, moves=200, seed=0):
+    """Mean microseconds per move to validate, generate and execute moves"""
+    rng = random.Random(seed)
+    game_state = GameState(height, width)
+    BoardReader(game_state).read_board(scaled_setup(height, width, seed=seed))
+    validator = game_state.validator
+    executor = game_state.executor
+    # Let the whole board settle once, as the first move of a game would
+    executor.settle()
+
+    validate = generate = execute = 0
+    played = 0
+    while played < moves:
+        # Untimed, so it also builds any move table entries the position needs
+        fitting = playable_moves(game_state)
+
+        start = time.perf_counter_ns()
+        generate_move_array(game_state, game_state.current_player)
+        generate += time.perf_counter_ns() - start
+
+        if not fitting or game_state.check_win_condition():
+            # Start over rather than stop, so every size plays the same number of moves
+            game_state = GameState(height, width)
+            BoardReader(game_state).read_board(scaled_setup(height, width, seed=seed + played + 1))
+            validator = game_state.validator
+            executor = game_state.executor
+            executor.settle()
+            continue
+
+        row, col, direction = decode_move(rng.choice(fitting), width)
+        start = time.perf_counter_ns()
+        validator.is_valid_move(row, col, direction)
+        validate += time.perf_counter_ns() - start
+
+        start = time.perf_counter_ns()
+        executor.execute_move(row, col, direction)
+        execute += time.perf_counter_ns() - start
+
+        game_state.switch_player()
+        played += 1
+
+    return {
+        'height': height,
+        'width': width,
+        'moves': played,
+        'validate_us': validate / played / 1000,
+        'generate_us': generate / played / 1000,
+        'execute_us': execute / played / 1000
+    }
+
+
+def scaling(sizes=DEFAULT_SIZES, moves=200, seed=0):
+    """Run time_moves for a square board of every size"""
+    return [time_moves(size, size, moves, seed) for size in sizes]
+
+
+def measure(func, repeat=5):
+    """Best microseconds per call of func over repeat timing runs"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def measure_moves(position, moves, repeat=3):
+    """Best microseconds per execute_move of each of moves on a fresh copy of a settled position"""
+    best = None
+    for _ in range(repeat):
+        executors = [decode_state(position).executor for _ in moves]
+        for executor in executors:
+            # position is settled, so no column needs gravity before the move
+            executor.bits.dirty_columns = 0
+        start = time.perf_counter_ns()
+        for executor, move in zip(executors, moves):
+            executor.execute_move(*move)
+        elapsed = (time.perf_counter_ns() - start) / len(moves) / 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def setup_state(height, width, seed=0):
+    """A GameState laid out by scaled_setup"""
+    game_state = GameState(height, width)
+    BoardReader(game_state).read_board(scaled_setup(height, width, seed=seed))
+    return game_state
+
+
+def bench_validate(results):
+    """is_valid_move in every direction for each piece type"""
+    game_state = setup_state(16, 16)
+    validator = game_state.validator
+    for kind in 'abcd':
+        anchors = [divmod(idx, 16) for idx, piece in game_state.bits.table.anchors.items()
+                   if piece.lower() == kind]
+
+        def validate():
+            for row, col in anchors:
+                for direction in 'lrud':
+                    validator.is_valid_move(row, col, direction)
+
+        results[f'validate_{kind}'] = measure(validate) / (4 * len(anchors))
+
+
+def bench_execute(results, count=500):
+    """execute_move on fresh copies of settled positions, then gravity and sinks alone"""
+    game_state = setup_state(16, 16)
+    executor = game_state.executor
+    executor.settle()
+    rng = random.Random(0)
+    moves = [decode_move(code, 16) for code in playable_moves(game_state)]
+    results['execute_move'] = measure_moves(encode_state(game_state),
+                                            [rng.choice(moves) for _ in range(count)])
+
+    results['apply_gravity'] = measure(executor.apply_gravity)
+    results['check_sinks'] = measure(executor.check_sinks)
+
+
+def bench_read_board(results):
+    """read_board on setup lines for a 10x10 and a 64x64 board"""
+    for size in (10, 64):
+        setup = scaled_setup(size, size, pieces=8)
+        results[f'read_board_{size}'] = measure(
+            lambda: BoardReader(GameState(size, size)).read_board(setup))
+
+
+def bench_render(results):
+    """render_board, the text print_board writes, for a 10x10 and a 64x64 board"""
+    for size in (10, 64):
+        game_state = setup_state(size, size)
+        results[f'render_board_{size}'] = measure(
+            lambda: BoardPrinter.render_board(game_state.board, game_state.bits))
+
+
+def bench_games(results, sizes=GAME_SIZES, games=5, repeat=3):
+    """Whole games between random players, per game"""
+    for size in sizes:
+        config = SimulationConfig(size, size, scaled_setup(size, size), max_moves=200)
+
+        def play():
+            for seed in range(games):
+                play_game(config, {'light': 'random', 'dark': 'random'}, seed)
+
+        results[f'game_{size}'] = min(timeit.repeat(play, number=1, repeat=repeat)) / games * 1e6
+
+
+def suite():
+    """Run every suite benchmark and return microseconds per operation by name"""
+    results = {}
+    bench_validate(results)
+    bench_execute(results)
+    bench_read_board(results)
+    bench_render(results)
+    bench_games(results)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Compare suite results with a baseline and list the regressions"""
+    comparison = {}
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline:
+            continue
+        ratio = value / baseline[name]
+        comparison[name] = {'baseline_us': baseline[name], 'current_us': value, 'ratio': ratio}
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return {'threshold': threshold, 'comparison': comparison, 'regressions': regressions}
+
+
+def start_up(code, runs):
+    """Mean milliseconds to run code in a fresh interpreter, and its last output"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    elapsed = 0
+    output = ''
+    for _ in range(runs):
+        start = time.perf_counter_ns()
+        output = subprocess.run([sys.executable, '-c', code], cwd=directory,
+                                capture_output=True, text=True, check=True).stdout
+        elapsed += time.perf_counter_ns() - start
+    return elapsed / runs / 1e6, output
+
+
+def import_time(module, runs=20):
+    """Mean cost of importing module in a fresh interpreter"""
+    interpreter_ms, _ = start_up('pass', runs)
+    total_ms, output = start_up(f"import sys, {module}; print('tkinter' in sys.modules)", runs)
+    return {
+        'module': module,
+        'runs': runs,
+        'interpreter_ms': interpreter_ms,
+        'import_ms': total_ms - interpreter_ms,
+        'tkinter_loaded': output.strip() == 'True'
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Run board game benchmarks and print JSON results")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    suite_parser = subparsers.add_parser('suite', help="rules engine micro and macro benchmarks")
+    suite_parser.add_argument('--save', help="write the results to this file as a baseline")
+    suite_parser.add_argument('--compare', help="baseline file to flag regressions against")
+    suite_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                              help="slowdown, as a fraction, that counts as a regression")
+    scaling_parser = subparsers.add_parser('scaling', help="per-move latency as boards grow")
+    scaling_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    scaling_parser.add_argument('--moves', type=int, default=200)
+    scaling_parser.add_argument('--seed', type=int, default=0)
+    imports_parser = subparsers.add_parser('imports', help="module import time in a fresh interpreter")
+    imports_parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES)
+    imports_parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.benchmark == 'suite':
+        results = suite()
+        if args.save:
+            with open(args.save, 'w') as f:
+                json.dump(results, f, indent=2)
+        if args.compare:
+            with open(args.compare) as f:
+                report = compare(results, json.load(f), args.threshold)
+            print(json.dumps(report, indent=2))
+            sys.exit(1 if report['regressions'] else 0)
+    elif args.benchmark == 'scaling':
+        results = scaling(args.sizes, args.moves, args.seed)
+    elif args.benchmark == 'imports':
+        results = [import_time(module, args.runs) for module in args.modules]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
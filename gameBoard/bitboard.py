@@ -0,0 +1,149 @@
+"""
+bitboard.py
+
+Bitboard representation of the game board, kept per column: bit row of
+column col's masks stands for cell (row, col), so a write touches ints
+no wider than the board is tall, whatever its area. Cells are numbered
+idx = row * width + col; a bytearray marks the occupied ones and sets
+hold each team's anchors and the sinks, for lookups by index. The string
+grid used by BoardPrinter and GUIGameMode is kept as a compatibility
+view and is only ever written through BitBoard.set_cell.
+"""
+
+from piecetable import PieceTable
+from zobrist import keys_for
+
+EMPTY = ' '
+SINK = 's'
+OBSTACLE = 'x'
+LIGHT_PIECES = 'abcd'
+DARK_PIECES = 'ABCD'
+
+
+def iter_bits(mask):
+    """Yield the index of every set bit in mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def iter_bits_reversed(mask):
+    """Yield the index of every set bit in mask, highest first"""
+    while mask:
+        idx = mask.bit_length() - 1
+        yield idx
+        mask ^= 1 << idx
+
+
+class BitBoard:
+    """Per-column team, sink and occupancy masks, plus per-cell occupancy, for a board"""
+
+    def __init__(self, board):
+        self.board = board
+        self.height = len(board)
+        self.width = len(board[0])
+        self.table = PieceTable(self.height, self.width)
+        self.keys = keys_for(self.height, self.width)
+        self.journal = None
+        self.load()
+
+    def load(self):
+        """Rebuild every mask from the string grid"""
+        self.occupied = bytearray(self.height * self.width)
+        self.light = set()
+        self.dark = set()
+        self.sinks = set()
+        self.column_occupied = [0] * self.width
+        self.column_light = [0] * self.width
+        self.column_dark = [0] * self.width
+        self.column_sinks = [0] * self.width
+        self.sink_columns = 0
+        self.table.clear()
+        self.hash = 0
+        self.dirty_columns = (1 << self.width) - 1
+        for row in range(self.height):
+            for col in range(self.width):
+                value = self.board[row][col]
+                if value != EMPTY:
+                    self._add(row, col, value)
+
+    def clear(self):
+        """Empty every cell in place, so views of the grid stay valid"""
+        for row in self.board:
+            row[:] = [EMPTY] * self.width
+        self.load()
+
+    def _add(self, row, col, value):
+        """Record value at (row, col) in the masks"""
+        idx = row * self.width + col
+        self.hash ^= self.keys.cell_key(idx, value)
+        bit = 1 << row
+        self.occupied[idx] = 1
+        self.column_occupied[col] |= bit
+        if value in LIGHT_PIECES:
+            self.light.add(idx)
+            self.column_light[col] |= bit
+            self.table.add_anchor(idx, value)
+        elif value in DARK_PIECES:
+            self.dark.add(idx)
+            self.column_dark[col] |= bit
+            self.table.add_anchor(idx, value)
+        elif value == SINK:
+            self.sinks.add(idx)
+            self.column_sinks[col] |= bit
+            self.sink_columns |= 1 << col
+        elif value != OBSTACLE:
+            self.table.add_extension(idx, int(value))
+
+    def _remove(self, row, col, value):
+        """Drop value at (row, col) from the masks"""
+        idx = row * self.width + col
+        self.hash ^= self.keys.cell_key(idx, value)
+        bit = ~(1 << row)
+        self.occupied[idx] = 0
+        self.column_occupied[col] &= bit
+        if value in LIGHT_PIECES:
+            self.light.discard(idx)
+            self.column_light[col] &= bit
+            self.table.remove_anchor(idx)
+        elif value in DARK_PIECES:
+            self.dark.discard(idx)
+            self.column_dark[col] &= bit
+            self.table.remove_anchor(idx)
+        elif value == SINK:
+            self.sinks.discard(idx)
+            self.column_sinks[col] &= bit
+            if not self.column_sinks[col]:
+                self.sink_columns &= ~(1 << col)
+        elif value != OBSTACLE:
+            self.table.remove_extension(idx)
+
+    def set_cell(self, row, col, value):
+        """Write value to a cell, keeping masks and grid in step"""
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise IndexError("list index out of range")
+        old = self.board[row][col]
+        if old == value:
+            return
+        if self.journal is not None:
+            self.journal.append((row * self.width + col, old))
+        if old != EMPTY:
+            self._remove(row, col, old)
+        if value != EMPTY:
+            self._add(row, col, value)
+        self.board[row][col] = value
+        self.dirty_columns |= 1 << col
+
+    def restore(self, changes):
+        """Undo a sequence of (idx, old value) writes recorded in the journal"""
+        for idx, value in reversed(changes):
+            self.set_cell(idx // self.width, idx % self.width, value)
+
+    def column_pieces(self, col):
+        """Mask of the rows holding a piece anchor in column col"""
+        return self.column_light[col] | self.column_dark[col]
+
+    def team_anchors(self, team):
+        """Set of the cells holding an anchor belonging to team"""
+        return self.light if team == 'light' else self.dark
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Opening book and endgame tablebase
+Usage: python book.py opening <height> <width> <setup file> <book file> [options]
+       python book.py endgame <height> <width> <setup file> <tablebase file> [options]
+
+Both are position tables: memory-mapped open-addressing hash tables that
+map GameState.position_hash to a 64-bit value, so a lookup is O(1) and
+loading a table reads nothing up front.
+
+The opening book stores the move AlphaBetaPlayer chose, searched offline,
+for every position within a few moves of a starting layout.
+
+An endgame tablebase stores the result, distance and best move for every
+position reachable from a set of positions with few pieces left. It is
+solved by retrograde analysis of the position graph: positions won for
+the side that just moved are losses for the side to move, a position
+with a move into a loss is a win, and a position whose moves all lead to
+wins for the opponent is a loss. Positions still undecided are draws
+only when their whole graph was explored.
+
+Generation runs in a multiprocessing pool.
+"""
+
+import argparse
+import itertools
+import mmap
+import multiprocessing
+import struct
+import sys
+from array import array
+from collections import deque
+
+from codec import decode_state, encode_state
+from engine import AlphaBetaPlayer, playable_moves
+from gameBoard import BoardReader, GameState
+from movegen import decode_move, encode_move
+from simulate import SimulationConfig
+
+MAGIC = b'BPT1'
+HEADER = struct.Struct('<4s4xQ')
+
+# Tablebase results, for the side to move
+WIN = 1
+LOSS = 2
+DRAW = 3
+
+
+class PositionTable:
+    """Read-only, memory-mapped position hash to value table"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.map)
+        magic, self.slots = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("not a position table file")
+        start = HEADER.size
+        self.keys = view[start:start + 8 * self.slots].cast('Q')
+        self.values = view[start + 8 * self.slots:start + 16 * self.slots].cast('Q')
+        self.mask = self.slots - 1
+
+    def get(self, key):
+        """Return the value stored for key, or None"""
+        slot = key & self.mask
+        while True:
+            stored = self.keys[slot]
+            if stored == key:
+                return self.values[slot]
+            if stored == 0:
+                return None
+            slot = (slot + 1) & self.mask
+
+    def close(self):
+        """Release the memory map"""
+        self.keys.release()
+        self.values.release()
+        self.map.close()
+
+
+def write_table(path, entries):
+    """Write a dict of position hash to value as a position table file"""
+    slots = 1
+    while slots < 2 * len(entries):
+        slots *= 2
+    keys = array('Q', bytes(8 * slots))
+    values = array('Q', bytes(8 * slots))
+    mask = slots - 1
+    for key, value in entries.items():
+        # Zero marks an empty slot
+        key = key or 1
+        slot = key & mask
+        while keys[slot] and keys[slot] != key:
+            slot = (slot + 1) & mask
+        keys[slot] = key
+        values[slot] = value
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, slots))
+        f.write(keys.tobytes())
+        f.write(values.tobytes())
+
+
+class OpeningBook(PositionTable):
+    """Opening book: position hash to the encoded move to play"""
+
+    def lookup(self, game_state):
+        """Return the book move (row, col, direction) for a position, or None"""
+        value = self.get(game_state.position_hash() or 1)
+        if not value:
+            return None
+        return decode_move(value - 1, game_state.width)
+
+
+class Tablebase(PositionTable):
+    """Endgame tablebase: position hash to result, distance and best move"""
+
+    def probe(self, game_state):
+        """Return (result, distance, move) for a position, or None.
+
+        move is None for positions with nothing left to play.
+        """
+        value = self.get(game_state.position_hash() or 1)
+        if value is None:
+            return None
+        result, distance, move = unpack_result(value)
+        if move is not None:
+            move = decode_move(move, game_state.width)
+        return result, distance, move
+
+
+def pack_result(result, distance, move):
+    """Pack a tablebase entry into a 64-bit value"""
+    return result | (distance << 2) | ((0 if move is None else move + 1) << 32)
+
+
+def unpack_result(value):
+    """Unpack a 64-bit tablebase value into (result, distance, encoded move)"""
+    move = value >> 32
+    return value & 3, (value >> 2) & 0x3FFFFFFF, move - 1 if move else None
+
+
+def hint(game_state, book=None, tablebase=None):
+    """Suggest a move from the book or the tablebase, or return None"""
+    if book is not None:
+        move = book.lookup(game_state)
+        if move is not None:
+            return move
+    if tablebase is not None:
+        entry = tablebase.probe(game_state)
+        if entry is not None:
+            return entry[2]
+    return None
+
+
+def load_setup(height, width, setup):
+    """Return a GameState laid out from input file setup lines"""
+    game_state = GameState(height, width)
+    BoardReader(game_state).read_board(setup)
+    return game_state
+
+
+def successors(game_state):
+    """Return (encoded move, encoded child position) for every playable move"""
+    executor = game_state.executor
+    children = []
+    for code in playable_moves(game_state):
+        undo = executor.make_move(*decode_move(code, game_state.width))
+        game_state.switch_player()
+        children.append((code, encode_state(game_state)))
+        game_state.switch_player()
+        executor.unmake_move(undo)
+    return children
+
+
+#-----------------------------------------------------------------------
+# Opening book generation
+#-----------------------------------------------------------------------
+
+def book_positions(root, plies):
+    """Return the encoded positions reachable from root within plies moves"""
+    seen = {}
+    frontier = [encode_state(root)]
+    for _ in range(plies + 1):
+        next_frontier = []
+        for encoded in frontier:
+            game_state = decode_state(encoded)
+            key = game_state.position_hash()
+            if key in seen or game_state.check_win_condition():
+                continue
+            seen[key] = encoded
+            for _, child in successors(game_state):
+                next_frontier.append(child)
+        frontier = next_frontier
+    return list(seen.values())
+
+
+def _book_entry(job):
+    """Search one book position in a pool worker"""
+    encoded, time_limit = job
+    game_state = decode_state(encoded)
+    move = AlphaBetaPlayer(time_limit=time_limit).choose_move(game_state)
+    if move is None:
+        return None
+    return game_state.position_hash(), encode_move(*move, game_state.width) + 1
+
+
+def build_book(root, plies=2, time_limit=1.0, workers=None):
+    """Search every position near root and return the book entries"""
+    jobs = [(encoded, time_limit) for encoded in book_positions(root, plies)]
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.map(_book_entry, jobs, chunksize=1)
+    return dict(result for result in results if result is not None)
+
+
+#-----------------------------------------------------------------------
+# Endgame tablebase generation
+#-----------------------------------------------------------------------
+
+def placement_roots(layout, pieces, light_sunk=0, dark_sunk=0):
+    """Yield encoded positions placing single-cell pieces on layout.
+
+    Every piece in pieces (drawn from 'a' and 'A') is put on a distinct
+    empty cell it would rest on, for both sides to move.
+    """
+    height, width = layout.height, layout.width
+    resting = [row * width + col
+               for row in range(height) for col in range(width)
+               if layout.board[row][col] == ' '
+               and (row == height - 1 or layout.board[row + 1][col] != ' ')]
+    for cells in itertools.permutations(resting, len(pieces)):
+        game_state = decode_state(encode_state(layout))
+        for piece, idx in zip(pieces, cells):
+            game_state.bits.set_cell(idx // width, idx % width, piece)
+        game_state.light_sinked_pieces = light_sunk
+        game_state.dark_sinked_pieces = dark_sunk
+        for player in ('light', 'dark'):
+            game_state.current_player = player
+            yield encode_state(game_state)
+
+
+def solve(roots, max_positions=1000000):
+    """Retrograde analysis of the graph reachable from roots.
+
+    Return a dict of position hash to packed result.
+    """
+    index = {}
+    positions = []
+    edges = []
+    frontier = deque()
+
+    def add(encoded):
+        game_state = decode_state(encoded)
+        key = game_state.position_hash()
+        if key not in index:
+            index[key] = len(positions)
+            positions.append(key)
+            edges.append(None)
+            frontier.append((len(positions) - 1, game_state))
+        return index[key]
+
+    for encoded in roots:
+        add(encoded)
+
+    results = []
+    complete = True
+    while frontier:
+        node, game_state = frontier.popleft()
+        if len(positions) >= max_positions:
+            complete = False
+            break
+        winner = game_state.check_win_condition()
+        if winner:
+            edges[node] = ()
+            results.append((node, WIN if winner == game_state.current_player else LOSS))
+            continue
+        children = [(code, add(child)) for code, child in successors(game_state)]
+        edges[node] = children
+        if not children:
+            results.append((node, DRAW))
+
+    count = len(positions)
+    result = [0] * count
+    distance = [0] * count
+    best = [None] * count
+    remaining = [0] * count
+    parents = [[] for _ in range(count)]
+    for node in range(count):
+        if edges[node] is None:
+            continue
+        remaining[node] = len(edges[node])
+        for code, child in edges[node]:
+            parents[child].append((node, code))
+
+    queue = deque()
+    for node, value in results:
+        result[node] = value
+        queue.append(node)
+    while queue:
+        child = queue.popleft()
+        for parent, code in parents[child]:
+            if result[parent]:
+                continue
+            if result[child] == LOSS:
+                result[parent] = WIN
+                distance[parent] = distance[child] + 1
+                best[parent] = code
+                queue.append(parent)
+            elif result[child] == WIN:
+                remaining[parent] -= 1
+                # Losing side delays the loss as long as it can
+                if best[parent] is None or distance[child] + 1 > distance[parent]:
+                    distance[parent] = distance[child] + 1
+                    best[parent] = code
+                if not remaining[parent]:
+                    result[parent] = LOSS
+                    queue.append(parent)
+
+    entries = {}
+    for node in range(count):
+        if result[node]:
+            entries[positions[node]] = pack_result(result[node], distance[node], best[node])
+        elif complete and edges[node] is not None:
+            entries[positions[node]] = pack_result(DRAW, 0, edges[node][0][0] if edges[node] else None)
+    return entries
+
+
+def _solve_chunk(job):
+    """Solve the graph of a chunk of roots in a pool worker"""
+    roots, max_positions = job
+    return solve(roots, max_positions)
+
+
+def build_tablebase(roots, workers=None, chunk=64, max_positions=1000000):
+    """Solve roots across a process pool and return the merged entries"""
+    roots = list(roots)
+    jobs = [(roots[start:start + chunk], max_positions) for start in range(0, len(roots), chunk)]
+    entries = {}
+    with multiprocessing.Pool(workers) as pool:
+        for chunk_entries in pool.imap_unordered(_solve_chunk, jobs):
+            for key, value in chunk_entries.items():
+                # A decided result beats a draw from a smaller graph
+                if key not in entries or entries[key] & 3 == DRAW:
+                    entries[key] = value
+    return entries
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Generate an opening book or an endgame tablebase")
+    parser.add_argument('kind', choices=['opening', 'endgame'])
+    parser.add_argument('height', type=int)
+    parser.add_argument('width', type=int)
+    parser.add_argument('setup', help="input file whose board setup is the starting layout")
+    parser.add_argument('output')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--plies', type=int, default=2, help="opening book depth")
+    parser.add_argument('--time', type=float, default=1.0, help="search time per book position")
+    parser.add_argument('--pieces', default='aA', help="endgame pieces to place, from 'a' and 'A'")
+    parser.add_argument('--light-sunk', type=int, default=3)
+    parser.add_argument('--dark-sunk', type=int, default=3)
+    parser.add_argument('--max-positions', type=int, default=1000000)
+    args = parser.parse_args(argv)
+
+    config = SimulationConfig.from_file(args.height, args.width, args.setup)
+    layout = load_setup(args.height, args.width, config.setup)
+    if args.kind == 'opening':
+        entries = build_book(layout, args.plies, args.time, args.workers)
+    else:
+        if any(piece not in 'aA' for piece in args.pieces):
+            parser.error("endgame pieces must be 'a' or 'A'")
+        # Endgames start from the layout's sinks and obstacles only
+        for idx in list(layout.bits.table.anchors) + list(layout.bits.table.owners):
+            layout.bits.set_cell(idx // args.width, idx % args.width, ' ')
+        roots = placement_roots(layout, args.pieces, args.light_sunk, args.dark_sunk)
+        entries = build_tablebase(roots, args.workers, max_positions=args.max_positions)
+    write_table(args.output, entries)
+    print(f"{len(entries)} positions written to {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,79 @@
+"""
+codec.py
+
+Compact binary encoding of a GameState. A position is a small header
+followed by one unsigned code per cell, row by row:
+
+    0       empty
+    1 - 8   pieces a b c d A B C D
+    9       sink
+    10      obstacle
+    11 + n  extension cell carrying identifier n
+
+Cells are stored as 16-bit codes, or 32-bit codes on boards too large
+for 16 bits to hold every identifier.
+"""
+
+import struct
+from array import array
+
+from gameBoard import GameState
+
+CELL_VALUES = ' abcdABCDsx'
+EXTENSION_BASE = len(CELL_VALUES)
+CELL_CODES = {value: code for code, value in enumerate(CELL_VALUES)}
+
+# height, width, dark to move, light sunk, dark sunk, cell typecode
+HEADER = struct.Struct('<HHBHHc')
+
+
+def cell_typecode(height, width):
+    """Array typecode wide enough for every cell code on a board size"""
+    return 'H' if height * width + EXTENSION_BASE <= 0xFFFF else 'I'
+
+
+def encode_cells(board):
+    """Return the cell codes of a string grid as an array"""
+    typecode = cell_typecode(len(board), len(board[0]))
+    codes = array(typecode)
+    for row in board:
+        for value in row:
+            code = CELL_CODES.get(value)
+            codes.append(EXTENSION_BASE + int(value) if code is None else code)
+    return codes
+
+
+def decode_cells(codes, height, width):
+    """Return the string grid for a sequence of cell codes"""
+    board = []
+    for row in range(height):
+        cells = []
+        for code in codes[row * width:(row + 1) * width]:
+            cells.append(CELL_VALUES[code] if code < EXTENSION_BASE else str(code - EXTENSION_BASE))
+        board.append(cells)
+    return board
+
+
+def encode_state(game_state):
+    """Encode a GameState into bytes"""
+    codes = encode_cells(game_state.board)
+    header = HEADER.pack(game_state.height, game_state.width,
+                         1 if game_state.current_player == 'dark' else 0,
+                         game_state.light_sinked_pieces, game_state.dark_sinked_pieces,
+                         codes.typecode.encode())
+    return header + codes.tobytes()
+
+
+def decode_state(data):
+    """Build a GameState from bytes produced by encode_state"""
+    height, width, dark_to_move, light_sunk, dark_sunk, typecode = HEADER.unpack_from(data)
+    codes = array(typecode.decode())
+    codes.frombytes(data[HEADER.size:])
+
+    game_state = GameState(height, width)
+    game_state.board[:] = decode_cells(codes, height, width)
+    game_state.bits.load()
+    game_state.current_player = 'dark' if dark_to_move else 'light'
+    game_state.light_sinked_pieces = light_sunk
+    game_state.dark_sinked_pieces = dark_sunk
+    return game_state
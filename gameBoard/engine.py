@@ -0,0 +1,284 @@
+"""
+engine.py
+
+Computer players. Every player has a choose_move(game_state) method that
+returns (row, col, direction) for game_state.current_player, or None when
+that side has no playable move. The position is left as it was found.
+
+AlphaBetaPlayer runs an iterative-deepening negamax alpha-beta search on
+make_move/unmake_move, with a fixed-size transposition table keyed by
+GameState.position_hash and a time budget per move. Given an opening
+book or an endgame tablebase (see book.py) it plays their move without
+searching whenever the position is in one.
+"""
+
+import random
+import time
+from collections import deque
+
+from movegen import decode_move, generate_move_array
+
+WIN_SCORE = 1000000
+SUNK_SCORE = 1000
+# Scores beyond this are wins found in the search, WIN_SCORE less their ply
+WIN_BOUND = WIN_SCORE // 2
+
+# Transposition table bound flags
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+def score_to_table(score, ply):
+    """Count a win score from the node storing it rather than from the root"""
+    if score > WIN_BOUND:
+        return score + ply
+    if score < -WIN_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """Count a stored win score from the root again, for a node at ply"""
+    if score > WIN_BOUND:
+        return score - ply
+    if score < -WIN_BOUND:
+        return score + ply
+    return score
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its time budget runs out"""
+
+
+def playable_moves(game_state):
+    """Return the encoded legal moves of the side to move that execute cleanly.
+
+    A move whose piece would end up partly off the board makes the
+    executor raise IndexError, so it is left out.
+    """
+    validator = game_state.validator
+    anchors = game_state.bits.table.anchors
+    moves = []
+    for code in generate_move_array(game_state, game_state.current_player):
+        idx, d = divmod(code, 4)
+        if validator.fits(idx, anchors[idx], d):
+            moves.append(code)
+    return moves
+
+
+class RandomPlayer:
+    """Plays a uniformly random legal move"""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose_move(self, game_state):
+        """Pick a random playable move"""
+        moves = playable_moves(game_state)
+        if not moves:
+            return None
+        return decode_move(self.rng.choice(moves), game_state.width)
+
+
+class AlphaBetaPlayer:
+    """Iterative-deepening alpha-beta search with a transposition table"""
+
+    def __init__(self, time_limit=0.1, max_depth=64, table_bits=18, book=None, tablebase=None):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = [None] * (1 << table_bits)
+        self.table_mask = (1 << table_bits) - 1
+        self.history = {}
+        self.book = book
+        self.tablebase = tablebase
+        self.nodes = 0
+        self.depth = 0
+
+    def choose_move(self, game_state):
+        """Search the position until the time budget runs out"""
+        self.state = game_state
+        self.executor = game_state.executor
+        self.distances = self.sink_distances(game_state)
+        self.deadline = time.perf_counter() + self.time_limit
+        self.nodes = 0
+        self.depth = 0
+
+        if self.book is not None:
+            move = self.book.lookup(game_state)
+            if move is not None:
+                return move
+        if self.tablebase is not None:
+            entry = self.tablebase.probe(game_state)
+            if entry is not None and entry[2] is not None:
+                return entry[2]
+
+        root_moves = playable_moves(game_state)
+        if not root_moves:
+            return None
+        best_move = root_moves[0]
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self.search_root(root_moves, depth)
+            except SearchTimeout:
+                break
+            best_move = move
+            self.depth = depth
+            # Searched best move first next time round
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            if abs(score) >= WIN_SCORE - self.max_depth:
+                break
+
+        return decode_move(best_move, game_state.width)
+
+    def search_root(self, root_moves, depth):
+        """Search every root move to depth and return (score, best move)"""
+        alpha = -WIN_SCORE - 1
+        beta = WIN_SCORE + 1
+        best_move = root_moves[0]
+        for code in root_moves:
+            score = -self.child_score(code, depth, -beta, -alpha, 1)
+            if score > alpha:
+                alpha = score
+                best_move = code
+        return alpha, best_move
+
+    def child_score(self, code, depth, alpha, beta, ply):
+        """Score the position after code from the mover's opponent's view"""
+        state = self.state
+        undo = self.executor.make_move(*decode_move(code, state.width))
+        state.switch_player()
+        try:
+            return self.negamax(depth - 1, alpha, beta, ply)
+        finally:
+            state.switch_player()
+            self.executor.unmake_move(undo)
+
+    def negamax(self, depth, alpha, beta, ply):
+        """Score the position from the side to move's point of view"""
+        self.nodes += 1
+        if not self.nodes & 31 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        state = self.state
+        winner = state.check_win_condition()
+        if winner:
+            score = WIN_SCORE - ply
+            return score if winner == state.current_player else -score
+        if depth <= 0:
+            return self.evaluate()
+
+        key = state.position_hash()
+        slot = key & self.table_mask
+        entry = self.table[slot]
+        tt_move = None
+        if entry is not None and entry[0] == key:
+            _, entry_depth, entry_score, flag, tt_move = entry
+            entry_score = score_from_table(entry_score, ply)
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return entry_score
+                if flag == LOWER and entry_score >= beta:
+                    return entry_score
+                if flag == UPPER and entry_score <= alpha:
+                    return entry_score
+
+        moves = generate_move_array(state, state.current_player)
+        history = self.history
+        ordered = sorted(moves, key=lambda code: history.get(code, 0), reverse=True)
+        if tt_move is not None and tt_move in moves:
+            ordered.remove(tt_move)
+            ordered.insert(0, tt_move)
+
+        alpha_start = alpha
+        best_score = None
+        best_move = None
+        for code in ordered:
+            try:
+                score = -self.child_score(code, depth, -beta, -alpha, ply + 1)
+            except IndexError:
+                continue
+            if best_score is None or score > best_score:
+                best_score = score
+                best_move = code
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                history[code] = history.get(code, 0) + depth * depth
+                break
+
+        if best_score is None:
+            return self.evaluate()
+
+        if best_score <= alpha_start:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if entry is None or entry[0] != key or entry[1] <= depth:
+            self.table[slot] = (key, depth, score_to_table(best_score, ply), flag, best_move)
+        return best_score
+
+    def evaluate(self):
+        """Static score from the side to move's point of view"""
+        state = self.state
+        bits = state.bits
+        distances = self.distances
+        score = SUNK_SCORE * (state.light_sinked_pieces - state.dark_sinked_pieces)
+        for idx in bits.light:
+            score -= distances[idx]
+        for idx in bits.dark:
+            score += distances[idx]
+        return score if state.current_player == 'light' else -score
+
+    @staticmethod
+    def sink_distances(game_state):
+        """Steps from every cell to the nearest cell resting on a sink"""
+        bits = game_state.bits
+        height = game_state.height
+        width = game_state.width
+        distances = [0] * (height * width)
+        targets = [idx - width for idx in bits.sinks if idx >= width]
+        if not targets:
+            return distances
+
+        seen = [False] * (height * width)
+        queue = deque()
+        for idx in targets:
+            seen[idx] = True
+            queue.append(idx)
+        while queue:
+            idx = queue.popleft()
+            row, col = divmod(idx, width)
+            for n_row, n_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if 0 <= n_row < height and 0 <= n_col < width:
+                    n_idx = n_row * width + n_col
+                    if not seen[n_idx]:
+                        seen[n_idx] = True
+                        distances[n_idx] = distances[idx] + 1
+                        queue.append(n_idx)
+        return distances
+
+
+ENGINES = {
+    'random': RandomPlayer,
+    'alphabeta': AlphaBetaPlayer
+}
+
+
+def create_player(name, **options):
+    """Create an engine player by name, or return None for 'human'.
+
+    options are passed on to the player's constructor.
+    """
+    if name == 'human':
+        return None
+    if name == 'mcts':
+        from mcts import MCTSPlayer
+        return MCTSPlayer(**options)
+    if name not in ENGINES:
+        raise ValueError(f"Unknown player: {name}")
+    return ENGINES[name](**options)
@@ -1,31 +1,52 @@
 #!/usr/bin/env python3
 """
 Unified Board Game Implementation
-Usage: python game.py <height> <width> <mode>
+Usage: python game.py <height> <width> <mode> [<light> <dark>]
+                      [--sink-border N] [--piece-border N]
 Where mode: 0 = text mode, 1 = GUI mode
+
+The GUI is in gameBoardGUI.py and tkinter is only imported when mode 1
+is chosen, so the rules can be used without Tk.
 """
 
+import os
 import sys
 import stdio
-import tkinter as tk
-from tkinter import messagebox
+from bitboard import BitBoard, iter_bits, iter_bits_reversed
+from movetable import DIRECTION_SLOTS, SHAPES, TYPE_SLOTS, tables_for
+
+MIN_BOARD_SIZE = 8
+MAX_BOARD_SIZE = 256
+
+# Sinks must lie within this many cells of an edge, pieces further in
+BORDER_WIDTH = 3
 
 
 class GameState:
     """Manages the game state and rules"""
     
-    def __init__(self, height, width):
+    def __init__(self, height, width, sink_border=BORDER_WIDTH, piece_border=BORDER_WIDTH):
         self.height = height
         self.width = width
+        self.sink_border = sink_border
+        self.piece_border = piece_border
         self.board = [[' ' for _ in range(width)] for _ in range(height)]
+        self.bits = BitBoard(self.board)
+        # Shared by every game mode, engine and tool working on this state
+        self.validator = MoveValidator(self.board, self.bits)
+        self.executor = MoveExecutor(self)
         self.light_sinked_pieces = 0
         self.dark_sinked_pieces = 0
         self.current_player = 'light'  # 'light' or 'dark'
         self.move_count = 0
         
     def reset_game(self):
-        """Reset the game to initial state"""
-        self.board = [[' ' for _ in range(self.width)] for _ in range(self.height)]
+        """Reset the game to initial state.
+        
+        The board is emptied in place, so validators, executors and readers
+        already bound to this state keep working.
+        """
+        self.bits.clear()
         self.light_sinked_pieces = 0
         self.dark_sinked_pieces = 0
         self.current_player = 'light'
@@ -35,6 +56,11 @@ class GameState:
         """Switch to the other player"""
         self.current_player = 'dark' if self.current_player == 'light' else 'light'
     
+    def position_hash(self):
+        """64-bit Zobrist hash of the board, side to move and sink counters"""
+        return self.bits.hash ^ self.bits.keys.position_key(
+            self.current_player, self.light_sinked_pieces, self.dark_sinked_pieces)
+    
     def check_win_condition(self):
         """Check if someone has won"""
         if self.light_sinked_pieces >= 4:
@@ -85,18 +111,18 @@ class BoardValidator:
     """Validates board positions and piece placement"""
     
     @staticmethod
-    def check_sink_range(row_max, col_max, row, col):
+    def check_sink_range(row_max, col_max, row, col, border=BORDER_WIDTH):
         """Check if a sink is in the correct position"""
         if (col >= 0 and col < col_max) and (row >= 0 and row < row_max):
-            if (row < 3 or row >= row_max - 3) or (col < 3 or col >= col_max - 3):
+            if (row < border or row >= row_max - border) or (col < border or col >= col_max - border):
                 return True
         return False
     
     @staticmethod
-    def check_piece_range(row_max, col_max, row, col):
+    def check_piece_range(row_max, col_max, row, col, border=BORDER_WIDTH):
         """Check if a piece is in the correct position"""
         if (row >= 0 and row < row_max) and (col >= 0 and col < col_max):
-            if (row >= 3 and row < row_max - 3) and (col >= 3 and col < col_max - 3):
+            if (row >= border and row < row_max - border) and (col >= border and col < col_max - border):
                 return True
         return False
     
@@ -109,10 +135,12 @@ class BoardValidator:
 class MoveValidator:
     """Validates moves according to game rules"""
     
-    def __init__(self, board):
+    def __init__(self, board, bits):
         self.board = board
+        self.bits = bits
         self.height = len(board)
         self.width = len(board[0])
+        self.tables = tables_for(self.height, self.width)
     
     def is_valid_move(self, row, col, direction):
         """Check if a move is valid"""
@@ -149,128 +177,70 @@ class MoveValidator:
         if piece in ['a', 'A']:
             return True
         
-        # Check if piece has extensions
-        identifier = str(row * self.width + col)
-        has_right_extension = (col + 1 < self.width and self.board[row][col + 1] == identifier)
-        has_down_extension = (row + 1 < self.height and self.board[row + 1][col] == identifier)
-        
-        return not (has_right_extension or has_down_extension)
+        return self.bits.table.is_upright(row * self.width + col)
+    
+    def is_clear(self, idx, piece, direction):
+        """Check the path of a move from idx is on the board and empty.
+        
+        direction is the index of the direction in 'lrud'.
+        """
+        paths = self.tables.paths(idx)
+        slot = TYPE_SLOTS[piece] + direction
+        path = paths[slot]
+        # Only look the orientation up when it changes the path
+        if path != paths[slot + 4] and not self.bits.table.is_upright(idx):
+            path = paths[slot + 4]
+        if path is None:
+            return False
+        occupied = self.bits.occupied
+        for cell in path:
+            if occupied[cell]:
+                return False
+        return True
+    
+    def fits(self, idx, piece, direction):
+        """Check the piece at idx still lies on the board after the move"""
+        slot = TYPE_SLOTS[piece] + direction
+        if not self.check_piece_upright(idx // self.width, idx % self.width, piece):
+            slot += 4
+        return self.tables.footprints(idx)[slot] is not None
     
     def validate_rightward_move(self, row, col, piece):
         """Validate rightward movement"""
-        is_upright = self.check_piece_upright(row, col, piece)
-        
-        if piece in ['a', 'A']:
-            if col + 1 < self.width and self.board[row][col + 1] == ' ':
-                return True, "Valid move"
-        elif piece in ['b', 'B']:
-            if is_upright:
-                if col + 1 < self.width and self.board[row][col + 1] == ' ':
-                    return True, "Valid move"
-            else:
-                if col + 2 < self.width and self.board[row][col + 1] == ' ' and self.board[row][col + 2] == ' ':
-                    return True, "Valid move"
-        elif piece in ['c', 'C']:
-            if is_upright:
-                if col + 1 < self.width and self.board[row][col + 1] == ' ':
-                    return True, "Valid move"
-            else:
-                if col + 3 < self.width and all(self.board[row][col + i] == ' ' for i in range(1, 4)):
-                    return True, "Valid move"
-        elif piece in ['d', 'D']:
-            if col + 2 < self.width and self.board[row][col + 1] == ' ' and self.board[row][col + 2] == ' ':
-                return True, "Valid move"
-        
+        if self.is_clear(row * self.width + col, piece, DIRECTION_SLOTS['r']):
+            return True, "Valid move"
         return False, "Path blocked or out of bounds"
     
     def validate_leftward_move(self, row, col, piece):
         """Validate leftward movement"""
-        is_upright = self.check_piece_upright(row, col, piece)
-        
-        if piece in ['a', 'A']:
-            if col - 1 >= 0 and self.board[row][col - 1] == ' ':
-                return True, "Valid move"
-        elif piece in ['b', 'B']:
-            if is_upright:
-                if col - 1 >= 0 and self.board[row][col - 1] == ' ':
-                    return True, "Valid move"
-            else:
-                if col - 2 >= 0 and self.board[row][col - 1] == ' ' and self.board[row][col - 2] == ' ':
-                    return True, "Valid move"
-        elif piece in ['c', 'C']:
-            if is_upright:
-                if col - 1 >= 0 and self.board[row][col - 1] == ' ':
-                    return True, "Valid move"
-            else:
-                if col - 3 >= 0 and all(self.board[row][col - i] == ' ' for i in range(1, 4)):
-                    return True, "Valid move"
-        elif piece in ['d', 'D']:
-            if col - 2 >= 0 and self.board[row][col - 1] == ' ' and self.board[row][col - 2] == ' ':
-                return True, "Valid move"
-        
+        if self.is_clear(row * self.width + col, piece, DIRECTION_SLOTS['l']):
+            return True, "Valid move"
         return False, "Path blocked or out of bounds"
     
     def validate_upward_move(self, row, col, piece):
         """Validate upward movement"""
-        is_upright = self.check_piece_upright(row, col, piece)
-        
-        if piece in ['a', 'A']:
-            if row - 1 >= 0 and self.board[row - 1][col] == ' ':
-                return True, "Valid move"
-        elif piece in ['b', 'B']:
-            if is_upright:
-                if row - 1 >= 0 and self.board[row - 1][col] == ' ':
-                    return True, "Valid move"
-            else:
-                if row - 1 >= 0 and self.board[row - 1][col] == ' ':
-                    return True, "Valid move"
-        elif piece in ['c', 'C']:
-            if is_upright:
-                if row - 1 >= 0 and self.board[row - 1][col] == ' ':
-                    return True, "Valid move"
-            else:
-                if row - 1 >= 0 and self.board[row - 1][col] == ' ':
-                    return True, "Valid move"
-        elif piece in ['d', 'D']:
-            if row - 1 >= 0 and self.board[row - 1][col] == ' ':
-                return True, "Valid move"
-        
+        if self.is_clear(row * self.width + col, piece, DIRECTION_SLOTS['u']):
+            return True, "Valid move"
         return False, "Path blocked or out of bounds"
     
     def validate_downward_move(self, row, col, piece):
         """Validate downward movement"""
-        is_upright = self.check_piece_upright(row, col, piece)
-        
-        if piece in ['a', 'A']:
-            if row + 1 < self.height and self.board[row + 1][col] == ' ':
-                return True, "Valid move"
-        elif piece in ['b', 'B']:
-            if is_upright:
-                if row + 2 < self.height and self.board[row + 1][col] == ' ' and self.board[row + 2][col] == ' ':
-                    return True, "Valid move"
-            else:
-                if row + 1 < self.height and self.board[row + 1][col] == ' ':
-                    return True, "Valid move"
-        elif piece in ['c', 'C']:
-            if is_upright:
-                if row + 3 < self.height and all(self.board[row + i][col] == ' ' for i in range(1, 4)):
-                    return True, "Valid move"
-            else:
-                if row + 1 < self.height and self.board[row + 1][col] == ' ':
-                    return True, "Valid move"
-        elif piece in ['d', 'D']:
-            if row + 2 < self.height and self.board[row + 1][col] == ' ' and self.board[row + 2][col] == ' ':
-                return True, "Valid move"
-        
+        if self.is_clear(row * self.width + col, piece, DIRECTION_SLOTS['d']):
+            return True, "Valid move"
         return False, "Path blocked or out of bounds"
 
 
 class MoveExecutor:
-    """Executes moves on the board"""
+    """Executes moves on the board.
+
+    Each GameState builds one, as GameState.executor, next to its validator.
+    """
     
     def __init__(self, game_state):
         self.game_state = game_state
         self.board = game_state.board
+        self.bits = game_state.bits
+        self.validator = game_state.validator
         self.height = game_state.height
         self.width = game_state.width
     
@@ -281,8 +251,46 @@ class MoveExecutor:
         elif direction in ['u', 'd']:
             self.move_vertical(row, col, direction)
         
-        self.apply_gravity()
-        self.check_sinks()
+        self.settle()
+    
+    def make_move(self, row, col, direction):
+        """Execute a move and return an undo record for unmake_move"""
+        bits = self.bits
+        light = self.game_state.light_sinked_pieces
+        dark = self.game_state.dark_sinked_pieces
+        dirty_columns = bits.dirty_columns
+        
+        bits.journal = []
+        try:
+            self.execute_move(row, col, direction)
+        except Exception:
+            changes = bits.journal
+            bits.journal = None
+            self.unmake_move((changes, 0, 0, dirty_columns))
+            raise
+        changes = tuple(bits.journal)
+        bits.journal = None
+        
+        return (changes,
+                self.game_state.light_sinked_pieces - light,
+                self.game_state.dark_sinked_pieces - dark,
+                dirty_columns)
+    
+    def unmake_move(self, undo):
+        """Restore the position from before the move that produced undo"""
+        changes, light_delta, dark_delta, dirty_columns = undo
+        self.bits.restore(changes)
+        self.game_state.light_sinked_pieces -= light_delta
+        self.game_state.dark_sinked_pieces -= dark_delta
+        self.bits.dirty_columns = dirty_columns
+    
+    def settle(self):
+        """Apply gravity and sinks to the columns written since the last settle"""
+        columns = self.bits.dirty_columns
+        self.apply_gravity(columns)
+        # Gravity leaves these columns at rest; only captures dirty them again
+        self.bits.dirty_columns = 0
+        self.check_sinks(columns)
     
     def move_horizontal(self, row, col, direction):
         """Move piece horizontally"""
@@ -290,8 +298,8 @@ class MoveExecutor:
         delta = 1 if direction == 'r' else -1
         
         if piece in ['a', 'A']:
-            self.board[row][col] = ' '
-            self.board[row][col + delta] = piece
+            self.bits.set_cell(row, col, ' ')
+            self.bits.set_cell(row, col + delta, piece)
         elif piece in ['b', 'B']:
             self.move_medium_piece_horizontal(row, col, delta)
         elif piece in ['c', 'C']:
@@ -305,8 +313,8 @@ class MoveExecutor:
         delta = 1 if direction == 'd' else -1
         
         if piece in ['a', 'A']:
-            self.board[row][col] = ' '
-            self.board[row + delta][col] = piece
+            self.bits.set_cell(row, col, ' ')
+            self.bits.set_cell(row + delta, col, piece)
         elif piece in ['b', 'B']:
             self.move_medium_piece_vertical(row, col, delta)
         elif piece in ['c', 'C']:
@@ -314,199 +322,162 @@ class MoveExecutor:
         elif piece in ['d', 'D']:
             self.move_square_piece_vertical(row, col, delta)
     
+    def clear_piece(self, row, col):
+        """Clear a piece and every extension cell carrying its identifier"""
+        for idx in self.bits.table.footprint(row * self.width + col):
+            self.bits.set_cell(idx // self.width, idx % self.width, ' ')
+    
     def move_medium_piece_horizontal(self, row, col, delta):
         """Move medium piece horizontally"""
         piece = self.board[row][col]
-        validator = MoveValidator(self.board)
-        is_upright = validator.check_piece_upright(row, col, piece)
-        
-        # Clear current position
-        identifier = str(row * self.width + col)
-        self.board[row][col] = ' '
+        is_upright = self.validator.check_piece_upright(row, col, piece)
         
-        # Clear extensions
-        for i in range(self.height):
-            for j in range(self.width):
-                if self.board[i][j] == identifier:
-                    self.board[i][j] = ' '
+        self.clear_piece(row, col)
         
         # Place in new position
         new_col = col + delta
-        self.board[row][new_col] = piece
+        self.bits.set_cell(row, new_col, piece)
         
         # Add extensions based on orientation
         new_identifier = str(row * self.width + new_col)
         if is_upright:
-            self.board[row + 1][new_col] = new_identifier
+            self.bits.set_cell(row + 1, new_col, new_identifier)
         else:
-            self.board[row][new_col + 1] = new_identifier
+            self.bits.set_cell(row, new_col + 1, new_identifier)
     
     def move_medium_piece_vertical(self, row, col, delta):
         """Move medium piece vertically"""
         piece = self.board[row][col]
-        validator = MoveValidator(self.board)
-        is_upright = validator.check_piece_upright(row, col, piece)
-        
-        # Clear current position
-        identifier = str(row * self.width + col)
-        self.board[row][col] = ' '
+        is_upright = self.validator.check_piece_upright(row, col, piece)
         
-        # Clear extensions
-        for i in range(self.height):
-            for j in range(self.width):
-                if self.board[i][j] == identifier:
-                    self.board[i][j] = ' '
+        self.clear_piece(row, col)
         
         # Place in new position
         new_row = row + delta
-        self.board[new_row][col] = piece
+        self.bits.set_cell(new_row, col, piece)
         
         # Add extensions based on orientation
         new_identifier = str(new_row * self.width + col)
         if is_upright:
-            self.board[new_row + 1][col] = new_identifier
+            self.bits.set_cell(new_row + 1, col, new_identifier)
         else:
-            self.board[new_row][col + 1] = new_identifier
+            self.bits.set_cell(new_row, col + 1, new_identifier)
     
     def move_large_piece_horizontal(self, row, col, delta):
         """Move large piece horizontally"""
         piece = self.board[row][col]
-        validator = MoveValidator(self.board)
-        is_upright = validator.check_piece_upright(row, col, piece)
-        
-        # Clear current position
-        identifier = str(row * self.width + col)
-        self.board[row][col] = ' '
+        is_upright = self.validator.check_piece_upright(row, col, piece)
         
-        # Clear extensions
-        for i in range(self.height):
-            for j in range(self.width):
-                if self.board[i][j] == identifier:
-                    self.board[i][j] = ' '
+        self.clear_piece(row, col)
         
         # Place in new position
         new_col = col + delta
-        self.board[row][new_col] = piece
+        self.bits.set_cell(row, new_col, piece)
         
         # Add extensions based on orientation
         new_identifier = str(row * self.width + new_col)
         if is_upright:
-            self.board[row + 1][new_col] = new_identifier
-            self.board[row + 2][new_col] = new_identifier
+            self.bits.set_cell(row + 1, new_col, new_identifier)
+            self.bits.set_cell(row + 2, new_col, new_identifier)
         else:
-            self.board[row][new_col + 1] = new_identifier
-            self.board[row][new_col + 2] = new_identifier
+            self.bits.set_cell(row, new_col + 1, new_identifier)
+            self.bits.set_cell(row, new_col + 2, new_identifier)
     
     def move_large_piece_vertical(self, row, col, delta):
         """Move large piece vertically"""
         piece = self.board[row][col]
-        validator = MoveValidator(self.board)
-        is_upright = validator.check_piece_upright(row, col, piece)
-        
-        # Clear current position
-        identifier = str(row * self.width + col)
-        self.board[row][col] = ' '
+        is_upright = self.validator.check_piece_upright(row, col, piece)
         
-        # Clear extensions
-        for i in range(self.height):
-            for j in range(self.width):
-                if self.board[i][j] == identifier:
-                    self.board[i][j] = ' '
+        self.clear_piece(row, col)
         
         # Place in new position
         new_row = row + delta
-        self.board[new_row][col] = piece
+        self.bits.set_cell(new_row, col, piece)
         
         # Add extensions based on orientation
         new_identifier = str(new_row * self.width + col)
         if is_upright:
-            self.board[new_row + 1][col] = new_identifier
-            self.board[new_row + 2][col] = new_identifier
+            self.bits.set_cell(new_row + 1, col, new_identifier)
+            self.bits.set_cell(new_row + 2, col, new_identifier)
         else:
-            self.board[new_row][col + 1] = new_identifier
-            self.board[new_row][col + 2] = new_identifier
+            self.bits.set_cell(new_row, col + 1, new_identifier)
+            self.bits.set_cell(new_row, col + 2, new_identifier)
     
     def move_square_piece_horizontal(self, row, col, delta):
         """Move square piece horizontally"""
         piece = self.board[row][col]
         
-        # Clear current position
-        identifier = str(row * self.width + col)
-        self.board[row][col] = ' '
-        
-        # Clear extensions
-        for i in range(self.height):
-            for j in range(self.width):
-                if self.board[i][j] == identifier:
-                    self.board[i][j] = ' '
+        self.clear_piece(row, col)
         
         # Place in new position
         new_col = col + delta
-        self.board[row][new_col] = piece
+        self.bits.set_cell(row, new_col, piece)
         
         # Add 2x2 extensions
         new_identifier = str(row * self.width + new_col)
-        self.board[row + 1][new_col] = new_identifier
-        self.board[row][new_col + 1] = new_identifier
-        self.board[row + 1][new_col + 1] = new_identifier
+        self.bits.set_cell(row + 1, new_col, new_identifier)
+        self.bits.set_cell(row, new_col + 1, new_identifier)
+        self.bits.set_cell(row + 1, new_col + 1, new_identifier)
     
     def move_square_piece_vertical(self, row, col, delta):
         """Move square piece vertically"""
         piece = self.board[row][col]
         
-        # Clear current position
-        identifier = str(row * self.width + col)
-        self.board[row][col] = ' '
-        
-        # Clear extensions
-        for i in range(self.height):
-            for j in range(self.width):
-                if self.board[i][j] == identifier:
-                    self.board[i][j] = ' '
+        self.clear_piece(row, col)
         
         # Place in new position
         new_row = row + delta
-        self.board[new_row][col] = piece
+        self.bits.set_cell(new_row, col, piece)
         
         # Add 2x2 extensions
         new_identifier = str(new_row * self.width + col)
-        self.board[new_row + 1][col] = new_identifier
-        self.board[new_row][col + 1] = new_identifier
-        self.board[new_row + 1][col + 1] = new_identifier
-    
-    def apply_gravity(self):
-        """Apply gravity to all pieces"""
-        for col in range(self.width):
-            for row in range(self.height - 2, -1, -1):
-                if self.board[row][col] != ' ' and self.board[row][col] != 's' and self.board[row][col] != 'x':
+        self.bits.set_cell(new_row + 1, col, new_identifier)
+        self.bits.set_cell(new_row, col + 1, new_identifier)
+        self.bits.set_cell(new_row + 1, col + 1, new_identifier)
+    
+    def apply_gravity(self, columns=None):
+        """Apply gravity to all pieces, or only those in the columns bitmask"""
+        bits = self.bits
+        if columns is None:
+            columns = (1 << self.width) - 1
+        for col in iter_bits(columns):
+            # Settle the pieces nearest the floor first so the ones behind land on them
+            for row in iter_bits_reversed(bits.column_pieces(col)):
+                below = bits.column_occupied[col] & ~((2 << row) - 1)
+                if below:
+                    target = (below & -below).bit_length() - 2
+                else:
+                    target = self.height - 1
+                
+                if target != row:
                     piece = self.board[row][col]
-                    if Piece.is_valid_piece(piece):
-                        target_row = row
-                        
-                        while (target_row + 1 < self.height and 
-                               self.board[target_row + 1][col] == ' '):
-                            target_row += 1
-                        
-                        if target_row != row:
-                            self.board[row][col] = ' '
-                            self.board[target_row][col] = piece
-    
-    def check_sinks(self):
-        """Check for pieces that have fallen into sinks"""
-        for row in range(self.height):
-            for col in range(self.width):
-                if self.board[row][col] == 's':
-                    if (row > 0 and 
-                        Piece.is_valid_piece(self.board[row - 1][col])):
-                        piece = self.board[row - 1][col]
-                        team = Piece.get_team(piece)
-                        
-                        if team == 'light':
-                            self.game_state.light_sinked_pieces += 1
-                        else:
-                            self.game_state.dark_sinked_pieces += 1
-                        
-                        self.board[row - 1][col] = ' '
+                    bits.set_cell(row, col, ' ')
+                    bits.set_cell(target, col, piece)
+    
+    def check_sinks(self, columns=None):
+        """Check for pieces that have fallen into sinks, optionally only in the columns bitmask"""
+        bits = self.bits
+        columns = bits.sink_columns if columns is None else columns & bits.sink_columns
+        for col in iter_bits(columns):
+            # A piece is captured when it rests on the cell directly above a sink
+            captured = (bits.column_sinks[col] >> 1) & bits.column_pieces(col)
+            if not captured:
+                continue
+            
+            self.game_state.light_sinked_pieces += bin(captured & bits.column_light[col]).count('1')
+            self.game_state.dark_sinked_pieces += bin(captured & bits.column_dark[col]).count('1')
+            
+            for row in iter_bits(captured):
+                bits.set_cell(row, col, ' ')
+
+
+class SetupError(ValueError):
+    """A problem with one board setup line"""
+    
+    def __init__(self, line_number, message):
+        super().__init__(message)
+        self.line_number = line_number
+        self.message = message
 
 
 class BoardReader:
@@ -515,124 +486,170 @@ class BoardReader:
     def __init__(self, game_state):
         self.game_state = game_state
         self.board = game_state.board
+        self.bits = game_state.bits
         self.height = game_state.height
         self.width = game_state.width
     
-    def read_board(self):
-        """Read board configuration from stdin"""
+    def read_board(self, lines=None):
+        """Read board configuration from stdin, or from an iterable of lines.
+        
+        Raise SetupError for the first problem with the setup.
+        """
+        errors = self.parse(lines)
+        if errors:
+            raise errors[0]
+        return self.board
+    
+    def parse(self, lines=None):
+        """Lay out the board from setup lines in one pass and return every problem.
+        
+        Each line is checked and placed as it is read, extension cells of
+        multi-cell pieces included, so the board is complete once the
+        closing '#' is read. A bad line is skipped and reading goes on;
+        the problems are returned as SetupErrors in line order, and the
+        list is empty for a valid setup.
+        """
+        if lines is not None:
+            lines = iter(lines)
+        errors = []
+        line_number = 0
         while True:
             try:
-                line = stdio.readLine()
-                if line == '#':
-                    break
-            except EOFError:
+                line = stdio.readLine() if lines is None else next(lines)
+            except (EOFError, StopIteration):
+                break
+            line_number += 1
+            if line.strip() == '#':
                 break
             
-            board_input = line.split()
-            type_of_object = board_input[0]
-            
+            message = self.parse_line(line.split())
+            if message:
+                errors.append(SetupError(line_number, message))
+        return errors
+    
+    def parse_line(self, fields):
+        """Place what one setup line describes, or return why it cannot be placed"""
+        if not fields or fields[0].startswith('#'):
+            return None
+        
+        type_of_object = fields[0]
+        try:
             if type_of_object == 'x':
-                row = int(board_input[1])
-                col = int(board_input[2])
-                
-                if BoardValidator.field_on_board(row, col, self.board):
-                    self.board[row][col] = 'x'
-            
+                row = int(fields[1])
+                col = int(fields[2])
             elif type_of_object == 's':
-                piece_size = int(board_input[1])
-                row = int(board_input[2])
-                col = int(board_input[3])
-                
-                if not BoardValidator.field_on_board(row, col, self.board):
-                    continue
-                    
-                if not BoardValidator.check_sink_range(self.height, self.width, row, col):
-                    stdio.writeln("ERROR: Sink in the wrong position")
-                    sys.exit(1)
-                    
-                for i in range(row, min(row + piece_size, self.height)):
-                    for j in range(col, min(col + piece_size, self.width)):
-                        self.board[i][j] = 's'
-            
+                piece_size = int(fields[1])
+                row = int(fields[2])
+                col = int(fields[3])
+                if piece_size < 1:
+                    return "Invalid setup line"
             elif type_of_object in ['d', 'l']:
-                piece_type = board_input[1]
-                row = int(board_input[2])
-                col = int(board_input[3])
-                
-                if not BoardValidator.field_on_board(row, col, self.board):
-                    continue
-                    
-                if not BoardValidator.check_piece_range(self.height, self.width, row, col):
-                    stdio.writeln("ERROR: Piece in the wrong position")
-                    sys.exit(1)
-                    
-                if type_of_object == 'd':
-                    piece_upper_case = piece_type.upper()
-                    self.board[row][col] = piece_upper_case
-                else:
-                    self.board[row][col] = piece_type
+                piece_type = fields[1]
+                row = int(fields[2])
+                col = int(fields[3])
+                if not Piece.is_valid_piece(piece_type):
+                    return "Invalid setup line"
+            else:
+                return "Invalid setup line"
+        except (IndexError, ValueError):
+            return "Invalid setup line"
+        
+        if not BoardValidator.field_on_board(row, col, self.board):
+            return "Field not on board"
+        
+        if type_of_object == 'x':
+            return self.place_obstacle(row, col)
+        elif type_of_object == 's':
+            return self.place_sink(piece_size, row, col)
+        elif type_of_object == 'd':
+            return self.place_piece(piece_type.upper(), row, col)
+        return self.place_piece(piece_type.lower(), row, col)
+    
+    def place_obstacle(self, row, col):
+        """Place an obstacle"""
+        if self.board[row][col] not in [' ', 'x']:
+            return "Field already occupied"
+        self.bits.set_cell(row, col, 'x')
+        return None
+    
+    def place_sink(self, piece_size, row, col):
+        """Place a sink of piece_size by piece_size cells, cut off at the board edge"""
+        if not BoardValidator.check_sink_range(self.height, self.width, row, col,
+                                               self.game_state.sink_border):
+            return "Sink in the wrong position"
+        
+        cells = [(i, j)
+                 for i in range(row, min(row + piece_size, self.height))
+                 for j in range(col, min(col + piece_size, self.width))]
+        if any(self.board[i][j] not in [' ', 's'] for i, j in cells):
+            return "Field already occupied"
+        for i, j in cells:
+            self.bits.set_cell(i, j, 's')
+        return None
+    
+    def place_piece(self, piece, row, col):
+        """Place a piece and lay out its extension cells"""
+        if not BoardValidator.check_piece_range(self.height, self.width, row, col,
+                                                self.game_state.piece_border):
+            return "Piece in the wrong position"
+        if self.board[row][col] != ' ':
+            return "Field already occupied"
         
-        self.field_for_bottom_left_most()
-        return self.board
+        extension = self.free_extension(piece, row, col)
+        if extension is None:
+            return "No room for piece"
+        
+        self.bits.set_cell(row, col, piece)
+        identifier = str(row * self.width + col)
+        for i, j in extension:
+            self.bits.set_cell(i, j, identifier)
+        return None
     
-    def field_for_bottom_left_most(self):
-        """Update the fields for multi-cell pieces"""
-        for i in range(self.height):
-            for j in range(self.width):
-                if self.board[i][j] in ['b', 'B', 'c', 'C', 'd', 'D']:
-                    identifier = str(i * self.width + j)
-                    piece = self.board[i][j]
-                    
-                    if piece in ['b', 'B']:
-                        # Size 2 piece
-                        if i + 1 < self.height and self.board[i + 1][j] == ' ':
-                            self.board[i + 1][j] = identifier
-                        elif j + 1 < self.width and self.board[i][j + 1] == ' ':
-                            self.board[i][j + 1] = identifier
-                            
-                    elif piece in ['c', 'C']:
-                        # Size 3 piece
-                        if i + 2 < self.height and self.board[i + 1][j] == ' ' and self.board[i + 2][j] == ' ':
-                            self.board[i + 1][j] = identifier
-                            self.board[i + 2][j] = identifier
-                        elif j + 2 < self.width and self.board[i][j + 1] == ' ' and self.board[i][j + 2] == ' ':
-                            self.board[i][j + 1] = identifier
-                            self.board[i][j + 2] = identifier
-                            
-                    elif piece in ['d', 'D']:
-                        # 2x2 piece
-                        if (i + 1 < self.height and j + 1 < self.width and 
-                            self.board[i + 1][j] == ' ' and self.board[i][j + 1] == ' ' and 
-                            self.board[i + 1][j + 1] == ' '):
-                            self.board[i + 1][j] = identifier
-                            self.board[i][j + 1] = identifier
-                            self.board[i + 1][j + 1] = identifier
+    def free_extension(self, piece, row, col):
+        """Return the extension cells of a piece placed at (row, col), or None.
+        
+        A piece stands upright when the cells below its anchor are free
+        and lies to the right otherwise.
+        """
+        for shape in SHAPES[piece.lower()]:
+            cells = [(row + i, col + j) for i, j in shape[1:]]
+            if all(0 <= i < self.height and 0 <= j < self.width and self.board[i][j] == ' '
+                   for i, j in cells):
+                return cells
+        return None
 
 
 class BoardPrinter:
     """Handles board printing for text mode"""
     
     @staticmethod
-    def print_board(board):
-        """Print the board to stdout"""
+    def print_board(board, bits=None):
+        """Print the board to stdout with a single write"""
+        stdio.write(BoardPrinter.render_board(board, bits))
+    
+    @staticmethod
+    def render_board(board, bits=None):
+        """Render the board as the text print_board writes"""
         height = len(board)
         width = len(board[0])
+        owners = bits.table.owners if bits is not None else None
+        separator = '  ' + '+--' * width + '+\n'
         
-        # Print column numbers
-        stdio.write('    ' + '  '.join(str(i) for i in range(width)))
-        stdio.writeln()
+        # Column numbers and horizontal line
+        lines = ['    ' + '  '.join(str(i) for i in range(width)) + '\n', separator]
         
-        # Print horizontal line
-        stdio.write('  ' + '+--' * width + '+')
-        stdio.writeln()
-        
-        # Print each row from top to bottom (reverse order)
+        # Each row from top to bottom (reverse order)
         for i in range(height - 1, -1, -1):
             row = []
             for j in range(width):
                 cell = board[i][j]
                 
-                if BoardPrinter.is_identifier(board, cell):
+                if owners is not None:
+                    is_extension = i * width + j in owners
+                else:
+                    is_extension = BoardPrinter.is_identifier(board, cell)
+                
+                if is_extension:
                     row.append(cell)
                 elif cell == 's':
                     row.append(' s')
@@ -643,10 +660,10 @@ class BoardPrinter:
                 else:
                     row.append('  ')
             
-            stdio.write(str(i) + ' |' + '|'.join(row) + '|')
-            stdio.writeln()
-            stdio.write('  ' + '+--' * width + '+')
-            stdio.writeln()
+            lines.append(str(i) + ' |' + '|'.join(row) + '|\n')
+            lines.append(separator)
+        
+        return ''.join(lines)
     
     @staticmethod
     def is_identifier(board, cell):
@@ -667,46 +684,54 @@ class BoardPrinter:
 class TextGameMode:
     """Handles text-based game mode"""
     
-    def __init__(self, game_state):
+    def __init__(self, game_state, players=None):
         self.game_state = game_state
-        self.validator = MoveValidator(game_state.board)
-        self.executor = MoveExecutor(game_state)
+        self.players = players or {}
+        self.validator = game_state.validator
+        self.executor = game_state.executor
         self.board_reader = BoardReader(game_state)
         self.is_light_player = True
         self.move_count = 0
     
     def run(self):
         """Run the text-based game"""
+        # Output is flushed once per turn rather than on every write
+        stdio.setBuffered(True)
+        
         # Read board configuration
-        self.board_reader.read_board()
-        BoardPrinter.print_board(self.game_state.board)
+        exit_on_setup_errors(self.board_reader.parse())
+        BoardPrinter.print_board(self.game_state.board, self.game_state.bits)
         
         # Main game loop
         while True:
-            try:
-                line = stdio.readLine()
-            except EOFError:
-                BoardPrinter.print_board(self.game_state.board)
-                stdio.writeln("Partial game")
-                sys.exit(0)
-            
-            if not line:
-                BoardPrinter.print_board(self.game_state.board)
-                stdio.writeln("Partial game")
-                sys.exit(0)
-            
-            move = line.split()
-            if len(move) != 3:
-                stdio.writeln("ERROR: Invalid move format")
-                continue
+            stdio.flush()
+            player = self.players.get(self.game_state.current_player)
+            if player is not None:
+                move = player.choose_move(self.game_state)
+                if move is None:
+                    BoardPrinter.print_board(self.game_state.board, self.game_state.bits)
+                    stdio.writeln("Partial game")
+                    sys.exit(0)
+                row, col, action = move
+                stdio.writeln(f"{row} {col} {action}")
+            else:
+                try:
+                    line = stdio.readLine()
+                except EOFError:
+                    BoardPrinter.print_board(self.game_state.board, self.game_state.bits)
+                    stdio.writeln("Partial game")
+                    sys.exit(0)
                 
-            try:
-                row = int(move[0])
-                col = int(move[1])
-                action = move[2]
-            except ValueError:
-                stdio.writeln("ERROR: Invalid move format")
-                continue
+                if not line:
+                    BoardPrinter.print_board(self.game_state.board, self.game_state.bits)
+                    stdio.writeln("Partial game")
+                    sys.exit(0)
+                
+                move = self.parse_move(line)
+                if move is None:
+                    stdio.writeln("ERROR: Invalid move format")
+                    continue
+                row, col, action = move
 
             # Validate move
             valid, message = self.validator.is_valid_move(row, col, action)
@@ -719,7 +744,7 @@ class TextGameMode:
             self.move_count += 1
 
             # Print board after move
-            BoardPrinter.print_board(self.game_state.board)
+            BoardPrinter.print_board(self.game_state.board, self.game_state.bits)
 
             # Check for win condition
             winner = self.game_state.check_win_condition()
@@ -731,125 +756,111 @@ class TextGameMode:
             self.game_state.switch_player()
             self.is_light_player = not self.is_light_player
             stdio.writeln(f"Next player: {'light' if self.is_light_player else 'dark'}")
-class GUIGameMode:
-    """Handles GUI-based game mode"""
-    
-    def __init__(self, game_state):
-        self.game_state = game_state
-        self.validator = MoveValidator(game_state.board)
-        self.executor = MoveExecutor(game_state)
-        self.board_reader = BoardReader(game_state)
-        self.is_light_player = True
-        self.root = tk.Tk()
-        self.root.title("Board Game")
-        self.canvas = tk.Canvas(self.root, width=600, height=600)
-        self.canvas.pack()
-        self.board_reader.read_board()  # <-- Add this line!
-        self.draw_board()
-        self.canvas.bind("<Button-1>", self.on_click)
-    
-    def draw_board(self):
-        """Draw the board on the canvas"""
-        self.canvas.delete("all")
-        height = len(self.game_state.board)
-        width = len(self.game_state.board[0])
-        
-        cell_size = 600 // max(height, width)
-        
-        for i in range(height):
-            for j in range(width):
-                x1 = j * cell_size
-                y1 = i * cell_size
-                x2 = x1 + cell_size
-                y2 = y1 + cell_size
-                
-                piece = self.game_state.board[i][j]
-                
-                if piece == 's':
-                    color = 'blue'
-                elif piece == 'x':
-                    color = 'red'
-                elif Piece.is_valid_piece(piece):
-                    color = 'green' if Piece.get_team(piece) == 'light' else 'black'
-                else:
-                    color = 'white'
-                
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline='black')
-                if piece != ' ':
-                    self.canvas.create_text((x1 + x2) // 2, (y1 + y2) // 2, text=piece, font=("Arial", 16))
-        
-        # Draw grid lines
-        for i in range(height + 1):
-            self.canvas.create_line(0, i * cell_size, width * cell_size, i * cell_size)
-        for j in range(width + 1):
-            self.canvas.create_line(j * cell_size, 0, j * cell_size, height * cell_size)
     
-    def on_click(self, event):
-        """Handle click events on the canvas"""
-        cell_size = 600 // max(len(self.game_state.board), len(self.game_state.board[0]))
-        
-        col = event.x // cell_size
-        row = event.y // cell_size  # Fix: y increases downward in Tkinter
-
-        if not (0 <= row < len(self.game_state.board) and 0 <= col < len(self.game_state.board[0])):
-            messagebox.showerror("Invalid Move", "Click outside the board area")
-            return
+    @staticmethod
+    def parse_move(line):
+        """Split a move line into (row, col, direction), or return None if it is malformed"""
+        move = line.split()
+        if len(move) != 3:
+            return None
+        try:
+            return int(move[0]), int(move[1]), move[2]
+        except ValueError:
+            return None
 
-        piece = self.game_state.board[row][col]
-        if not Piece.is_valid_piece(piece):
-            messagebox.showerror("Invalid Move", "No valid piece at this position")
-            return
 
-        # For demo, always try to move right ('r')
-        valid, message = self.validator.is_valid_move(row, col, 'r')
-        if not valid:
-            messagebox.showerror("Invalid Move", message)
-            return
+def __getattr__(name):
+    # The GUI lives in gameBoardGUI so that importing the rules never loads Tk
+    if name == 'GUIGameMode':
+        from gameBoardGUI import GUIGameMode
+        return GUIGameMode
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-        self.executor.execute_move(row, col, 'r')
-        self.draw_board()
 
-        winner = self.game_state.check_win_condition()
-        if winner:
-            messagebox.showinfo("Game Over", f"{winner.capitalize()} wins!")
-            self.root.quit()
+def exit_on_setup_errors(errors):
+    """Print every setup error and exit, as the game modes do, if there are any"""
+    if not errors:
+        return
+    for error in errors:
+        stdio.writeln(f"ERROR: {error}")
+    sys.exit(1)
 
-        self.game_state.switch_player()
-        self.is_light_player = not self.is_light_player
-        messagebox.showinfo("Next Player", f"Next player: {'light' if self.is_light_player else 'dark'}")
 
 def print_usage():
-    print("Usage: python gameBoardText.py <height> <width> <mode>")
-    print("  <height>: Board height (8, 9, or 10)")
-    print("  <width>: Board width (8, 9, or 10)")
+    print("Usage: python gameBoardText.py <height> <width> <mode> [<light> <dark>]")
+    print("                                [--sink-border N] [--piece-border N]")
+    print(f"  <height>: Board height ({MIN_BOARD_SIZE} to {MAX_BOARD_SIZE})")
+    print(f"  <width>: Board width ({MIN_BOARD_SIZE} to {MAX_BOARD_SIZE})")
     print("  <mode>: 0 for text mode, 1 for GUI mode")
+    print("  <light>, <dark>: human (default), random, alphabeta or mcts")
+    print(f"  --sink-border N: sinks lie within N cells of an edge (default {BORDER_WIDTH})")
+    print(f"  --piece-border N: pieces lie at least N cells from every edge (default {BORDER_WIDTH})")
 
-if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print_usage()
-        sys.exit(1)
 
-    try:
-        height = int(sys.argv[1])
-        width = int(sys.argv[2])
-        mode = int(sys.argv[3])
-    except ValueError:
+def parse_args(argv):
+    """Parse the command line, or print the usage and exit if it is malformed"""
+    # Imported here so that importing the rules does not pay for it
+    import argparse
+
+    def usage_error(message=None):
         print_usage()
         sys.exit(1)
 
-    if height not in [8, 9, 10] or width not in [8, 9, 10]:
-        print("ERROR: Height and width must be 8, 9, or 10.")
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.error = usage_error
+    parser.add_argument('height', type=int)
+    parser.add_argument('width', type=int)
+    parser.add_argument('mode', type=int)
+    parser.add_argument('players', nargs='*')
+    parser.add_argument('--sink-border', type=int, default=BORDER_WIDTH)
+    parser.add_argument('--piece-border', type=int, default=BORDER_WIDTH)
+    args = parser.parse_args(argv)
+    if len(args.players) not in [0, 2] or args.sink_border < 0 or args.piece_border < 0:
+        usage_error()
+    return args
+
+
+if __name__ == "__main__":
+    # engine and gameBoardGUI import gameBoard; let them share this module
+    # rather than load a second copy with its own classes
+    sys.modules.setdefault('gameBoard', sys.modules[__name__])
+
+    args = parse_args(sys.argv[1:])
+    height = args.height
+    width = args.width
+    mode = args.mode
+
+    if not (MIN_BOARD_SIZE <= height <= MAX_BOARD_SIZE and MIN_BOARD_SIZE <= width <= MAX_BOARD_SIZE):
+        print(f"ERROR: Height and width must be between {MIN_BOARD_SIZE} and {MAX_BOARD_SIZE}.")
         sys.exit(1)
 
-    game_state = GameState(height, width)
+    players = {}
+    if args.players:
+        import engine
+        try:
+            players['light'] = engine.create_player(args.players[0])
+            players['dark'] = engine.create_player(args.players[1])
+        except ValueError as error:
+            print(f"ERROR: {error}")
+            sys.exit(1)
+
+    game_state = GameState(height, width, args.sink_border, args.piece_border)
+
+    profiled = [sys.modules[__name__]]
+    if mode == 1:
+        from gameBoardGUI import GUIGameMode
+        profiled.append(sys.modules['gameBoardGUI'])
+    if os.environ.get('BOARDGAME_PROFILE'):
+        import profiling
+        profiling.install(*profiled)
 
     if mode == 0:
         # Text mode
-        game = TextGameMode(game_state)
+        game = TextGameMode(game_state, players)
         game.run()
     elif mode == 1:
         # GUI mode
-        game = GUIGameMode(game_state)
+        game = GUIGameMode(game_state, players)
         game.root.mainloop()
     else:
         print("ERROR: Mode must be 0 (text) or 1 (GUI).")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+GUI mode for the board game
+Usage: python gameBoard.py <height> <width> 1
+
+Kept apart from gameBoard.py so that only GUI mode imports tkinter.
+"""
+
+import tkinter as tk
+from tkinter import messagebox
+
+from gameBoard import BoardReader, Piece, exit_on_setup_errors
+
+
+class GUIGameMode:
+    """Handles GUI-based game mode"""
+    
+    def __init__(self, game_state, players=None):
+        self.game_state = game_state
+        self.players = players or {}
+        self.validator = game_state.validator
+        self.executor = game_state.executor
+        self.board_reader = BoardReader(game_state)
+        self.is_light_player = True
+        self.root = tk.Tk()
+        self.root.title("Board Game")
+        self.canvas = tk.Canvas(self.root, width=600, height=600)
+        self.canvas.pack()
+        # Rectangle and text item of every cell, by cell index
+        self.cell_items = []
+        exit_on_setup_errors(self.board_reader.parse())  # <-- Add this line!
+        self.draw_board()
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.schedule_engine_move()
+    
+    def draw_board(self):
+        """Draw the board on the canvas, creating its items the first time"""
+        if self.cell_items:
+            self.update_cells(range(self.game_state.height * self.game_state.width))
+            return
+        
+        height = len(self.game_state.board)
+        width = len(self.game_state.board[0])
+        
+        cell_size = 600 // max(height, width)
+        
+        for i in range(height):
+            for j in range(width):
+                x1 = j * cell_size
+                y1 = i * cell_size
+                x2 = x1 + cell_size
+                y2 = y1 + cell_size
+                
+                piece = self.game_state.board[i][j]
+                rectangle = self.canvas.create_rectangle(x1, y1, x2, y2, fill=self.cell_color(piece), outline='black')
+                text = self.canvas.create_text((x1 + x2) // 2, (y1 + y2) // 2, text=piece.strip(), font=("Arial", 16))
+                self.cell_items.append((rectangle, text))
+        
+        # Draw grid lines
+        for i in range(height + 1):
+            self.canvas.create_line(0, i * cell_size, width * cell_size, i * cell_size)
+        for j in range(width + 1):
+            self.canvas.create_line(j * cell_size, 0, j * cell_size, height * cell_size)
+    
+    def update_cells(self, cells):
+        """Refresh the fill and text of the cells with the given indexes"""
+        width = self.game_state.width
+        for idx in cells:
+            piece = self.game_state.board[idx // width][idx % width]
+            rectangle, text = self.cell_items[idx]
+            self.canvas.itemconfigure(rectangle, fill=self.cell_color(piece))
+            self.canvas.itemconfigure(text, text=piece.strip())
+    
+    @staticmethod
+    def cell_color(piece):
+        """Fill colour of a cell holding piece"""
+        if piece == 's':
+            return 'blue'
+        elif piece == 'x':
+            return 'red'
+        elif Piece.is_valid_piece(piece):
+            return 'green' if Piece.get_team(piece) == 'light' else 'black'
+        return 'white'
+    
+    def on_click(self, event):
+        """Handle click events on the canvas"""
+        if self.players.get(self.game_state.current_player) is not None:
+            return
+        
+        cell_size = 600 // max(len(self.game_state.board), len(self.game_state.board[0]))
+        
+        col = event.x // cell_size
+        row = event.y // cell_size  # Fix: y increases downward in Tkinter
+
+        if not (0 <= row < len(self.game_state.board) and 0 <= col < len(self.game_state.board[0])):
+            messagebox.showerror("Invalid Move", "Click outside the board area")
+            return
+
+        piece = self.game_state.board[row][col]
+        if not Piece.is_valid_piece(piece):
+            messagebox.showerror("Invalid Move", "No valid piece at this position")
+            return
+
+        # For demo, always try to move right ('r')
+        valid, message = self.validator.is_valid_move(row, col, 'r')
+        if not valid:
+            messagebox.showerror("Invalid Move", message)
+            return
+
+        self.play_move(row, col, 'r')
+    
+    def play_move(self, row, col, direction):
+        """Execute a validated move and hand the turn over"""
+        changes = self.executor.make_move(row, col, direction)[0]
+        # Only the cells the move wrote need redrawing
+        self.update_cells({idx for idx, _ in changes})
+
+        winner = self.game_state.check_win_condition()
+        if winner:
+            messagebox.showinfo("Game Over", f"{winner.capitalize()} wins!")
+            self.root.quit()
+            return
+
+        self.game_state.switch_player()
+        self.is_light_player = not self.is_light_player
+        if self.players.get(self.game_state.current_player) is not None:
+            self.schedule_engine_move()
+        else:
+            messagebox.showinfo("Next Player", f"Next player: {'light' if self.is_light_player else 'dark'}")
+    
+    def schedule_engine_move(self):
+        """Let an engine player move once the window has redrawn"""
+        if self.players.get(self.game_state.current_player) is not None:
+            self.root.after(50, self.play_engine_move)
+    
+    def play_engine_move(self):
+        """Ask the engine for the side to move for its move and play it"""
+        move = self.players[self.game_state.current_player].choose_move(self.game_state)
+        if move is None:
+            messagebox.showinfo("Game Over", "No moves left: partial game")
+            return
+        self.play_move(*move)
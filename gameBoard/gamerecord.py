@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Binary game records
+Usage: python gamerecord.py to-binary <height> <width> <input file> <record file>
+       python gamerecord.py to-text <record file> [<game number>]
+
+A record file holds any number of games, each a board setup plus the
+moves played from it:
+
+    file header     magic, version, game count, index offset
+    game            height, width, setup count, move count,
+                    setup entries (6 bytes each), padding to 4 bytes,
+                    moves (one uint32 each, encoded as in movegen),
+                    padding to a multiple of 8 bytes
+    index           one uint64 file offset per game (optional)
+
+Every field is little-endian. GameRecordFile memory-maps a record file;
+moves are returned as memoryviews into the map, so loading a game copies
+nothing on a little-endian host. Big-endian hosts swap the moves and
+offsets into arrays instead.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+
+from gameBoard import SetupError
+from movegen import DIRECTIONS, decode_move, encode_move
+
+MAGIC = b'BGR1'
+VERSION = 1
+
+FILE_HEADER = struct.Struct('<4sHxxIQ')
+GAME_HEADER = struct.Struct('<HHII')
+SETUP_ENTRY = struct.Struct('<BBhh')
+
+# Setup entry kinds, and the input file keyword for each
+SINK = 0
+OBSTACLE = 1
+LIGHT_PIECE = 2
+DARK_PIECE = 3
+SETUP_KEYWORDS = {'s': SINK, 'x': OBSTACLE, 'l': LIGHT_PIECE, 'd': DARK_PIECE}
+
+# What SETUP_ENTRY can hold of a sink size or piece character, and of a row or column
+VALUE_RANGE = range(0, 1 << 8)
+POSITION_RANGE = range(-(1 << 15), 1 << 15)
+
+# array and memoryview.cast use the host's byte order; the file is little-endian
+BIG_ENDIAN = sys.byteorder == 'big'
+
+
+def to_little_endian(values):
+    """Return an array's values as they are stored in a record file"""
+    if BIG_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def from_little_endian(view, typecode):
+    """Return stored values of typecode, as a view into view where no swap is needed"""
+    if not BIG_ENDIAN:
+        return view.cast(typecode)
+    values = array(typecode)
+    values.frombytes(view)
+    values.byteswap()
+    return values
+
+
+class GameRecord:
+    """A board setup and the moves played from it"""
+
+    def __init__(self, height, width, setup, moves):
+        self.height = height
+        self.width = width
+        self.setup = setup
+        self.moves = moves
+
+    def setup_lines(self):
+        """Return the setup in input file format, ending with '#'"""
+        keywords = {kind: keyword for keyword, kind in SETUP_KEYWORDS.items()}
+        lines = []
+        for kind, value, row, col in self.setup:
+            if kind == SINK:
+                lines.append(f"s {value} {row} {col}")
+            elif kind == OBSTACLE:
+                lines.append(f"x {row} {col}")
+            else:
+                lines.append(f"{keywords[kind]} {chr(value)} {row} {col}")
+        lines.append('#')
+        return lines
+
+    def move_tuples(self):
+        """Yield the moves as (row, col, direction)"""
+        for code in self.moves:
+            yield decode_move(code, self.width)
+
+    def to_text(self):
+        """Return the game in input file format"""
+        lines = self.setup_lines()
+        for row, col, direction in self.move_tuples():
+            lines.append(f"{row} {col} {direction}")
+        return '\n'.join(lines) + '\n'
+
+
+def parse_setup_line(line, line_number=0):
+    """Return the setup entry for an input file line, or None if it is not one.
+
+    Raise SetupError if the line's values do not fit in a setup entry.
+    """
+    tokens = line.split()
+    if not tokens or tokens[0] not in SETUP_KEYWORDS:
+        return None
+    kind = SETUP_KEYWORDS[tokens[0]]
+    try:
+        if kind == OBSTACLE:
+            entry = (kind, 0, int(tokens[1]), int(tokens[2]))
+        elif kind == SINK:
+            entry = (kind, int(tokens[1]), int(tokens[2]), int(tokens[3]))
+        else:
+            entry = (kind, ord(tokens[1]), int(tokens[2]), int(tokens[3]))
+    except (IndexError, ValueError, TypeError):
+        return None
+    _, value, row, col = entry
+    if value not in VALUE_RANGE:
+        raise SetupError(line_number, "Setup value out of range for a game record")
+    if row not in POSITION_RANGE or col not in POSITION_RANGE:
+        raise SetupError(line_number, "Position out of range for a game record")
+    return entry
+
+
+def parse_move_line(line, height, width):
+    """Return the encoded move for an input file line, or None if it is malformed"""
+    tokens = line.split()
+    if len(tokens) != 3 or tokens[2] not in DIRECTIONS:
+        return None
+    try:
+        row = int(tokens[0])
+        col = int(tokens[1])
+    except ValueError:
+        return None
+    if not (0 <= row < height and 0 <= col < width):
+        return None
+    return encode_move(row, col, tokens[2], width)
+
+
+def record_from_text(lines, height, width):
+    """Build a GameRecord from the lines of an input file.
+
+    Move lines the text mode would reject as malformed are left out. A
+    setup line whose values a record cannot hold raises SetupError.
+    """
+    setup = []
+    moves = array('I')
+    lines = iter(lines)
+    for line_number, line in enumerate(lines, 1):
+        if line.strip() == '#':
+            break
+        entry = parse_setup_line(line, line_number)
+        if entry is not None:
+            setup.append(entry)
+    for line in lines:
+        code = parse_move_line(line, height, width)
+        if code is not None:
+            moves.append(code)
+    return GameRecord(height, width, setup, moves)
+
+
+class GameRecordWriter:
+    """Writes games to a record file"""
+
+    def __init__(self, path, index=True):
+        self.file = open(path, 'wb')
+        self.index = index
+        self.offsets = array('Q')
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_game(self, record):
+        """Append a GameRecord"""
+        self.offsets.append(self.file.tell())
+        self.file.write(GAME_HEADER.pack(record.height, record.width,
+                                         len(record.setup), len(record.moves)))
+        for entry in record.setup:
+            self.file.write(SETUP_ENTRY.pack(*entry))
+        self.file.write(b'\0' * (-self.file.tell() % 4))
+        moves = record.moves if isinstance(record.moves, array) else array('I', record.moves)
+        self.file.write(to_little_endian(moves).tobytes())
+        self.file.write(b'\0' * (-self.file.tell() % 8))
+
+    def close(self):
+        """Write the index and the final header"""
+        if self.file.closed:
+            return
+        index_offset = 0
+        if self.index:
+            index_offset = self.file.tell()
+            self.file.write(to_little_endian(self.offsets).tobytes())
+        self.file.seek(0)
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, len(self.offsets), index_offset))
+        self.file.close()
+
+
+class GameRecordFile:
+    """Read-only, memory-mapped view of a record file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        magic, version, self.count, index_offset = FILE_HEADER.unpack_from(self.view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a game record file")
+        if index_offset:
+            self.offsets = from_little_endian(self.view[index_offset:index_offset + 8 * self.count], 'Q')
+        else:
+            self.offsets = self.scan_offsets()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, number):
+        if not 0 <= number < self.count:
+            raise IndexError("game number out of range")
+        return self.game_at(self.offsets[number])
+
+    def __iter__(self):
+        for number in range(self.count):
+            yield self[number]
+
+    def scan_offsets(self):
+        """Find the game offsets of a file written without an index"""
+        offsets = array('Q')
+        offset = FILE_HEADER.size
+        for _ in range(self.count):
+            offsets.append(offset)
+            _, _, setup_count, move_count = GAME_HEADER.unpack_from(self.view, offset)
+            offset += GAME_HEADER.size + SETUP_ENTRY.size * setup_count
+            offset += -offset % 4 + 4 * move_count
+            offset += -offset % 8
+        return offsets
+
+    def game_at(self, offset):
+        """Decode the game stored at a file offset"""
+        height, width, setup_count, move_count = GAME_HEADER.unpack_from(self.view, offset)
+        start = offset + GAME_HEADER.size
+        end = start + SETUP_ENTRY.size * setup_count
+        setup = list(SETUP_ENTRY.iter_unpack(self.view[start:end]))
+        end += -end % 4
+        moves = from_little_endian(self.view[end:end + 4 * move_count], 'I')
+        return GameRecord(height, width, setup, moves)
+
+    def close(self):
+        """Release the memory map. Move views handed out must be released first."""
+        if self.offsets is not None and isinstance(self.offsets, memoryview):
+            self.offsets.release()
+        self.offsets = None
+        self.view.release()
+        self.map.close()
+
+
+def print_usage():
+    print("Usage: python gamerecord.py to-binary <height> <width> <input file> <record file>")
+    print("       python gamerecord.py to-text <record file> [<game number>]")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 6 and sys.argv[1] == 'to-binary':
+        try:
+            height = int(sys.argv[2])
+            width = int(sys.argv[3])
+        except ValueError:
+            print_usage()
+            sys.exit(1)
+        with open(sys.argv[4]) as f:
+            try:
+                record = record_from_text(f, height, width)
+            except SetupError as error:
+                print(f"ERROR: line {error.line_number}: {error}")
+                sys.exit(1)
+        with GameRecordWriter(sys.argv[5]) as writer:
+            writer.write_game(record)
+    elif len(sys.argv) in [3, 4] and sys.argv[1] == 'to-text':
+        number = int(sys.argv[3]) if len(sys.argv) == 4 else 0
+        records = GameRecordFile(sys.argv[2])
+        sys.stdout.write(records[number].to_text())
+        records.close()
+    else:
+        print_usage()
+        sys.exit(1)
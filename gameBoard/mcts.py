@@ -0,0 +1,229 @@
+"""
+mcts.py
+
+Monte Carlo tree search player. Playouts run on make_move/unmake_move,
+so a search never copies the board. With more than one worker the search
+is root-parallel: every process in a multiprocessing pool grows its own
+tree from the same root, the root is shipped to the workers as a
+codec-encoded position, and the visit counts of the root moves are summed
+when the workers report back.
+"""
+
+import math
+import multiprocessing
+import os
+import random
+import time
+
+from codec import decode_state, encode_state
+from engine import AlphaBetaPlayer, playable_moves
+from movegen import decode_move, generate_move_array
+
+# Sample size of the heuristic rollout policy
+HEURISTIC_SAMPLES = 4
+DIRECTION_STEPS = {0: (0, -1), 1: (0, 1), 2: (-1, 0), 3: (1, 0)}
+
+
+class Node:
+    """A position in the search tree, reached by move"""
+
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move, parent, untried):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+    def select_child(self, exploration):
+        """Return the child with the highest UCT score"""
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+
+class TreeSearch:
+    """Single-process UCT search over one GameState"""
+
+    def __init__(self, game_state, root_moves, rollout='random', max_rollout=100,
+                 exploration=1.4, seed=None):
+        self.state = game_state
+        self.executor = game_state.executor
+        self.rng = random.Random(seed)
+        self.rollout_policy = rollout
+        self.max_rollout = max_rollout
+        self.exploration = exploration
+        self.distances = AlphaBetaPlayer.sink_distances(game_state)
+        self.root = Node(None, None, list(root_moves))
+        self.playouts = 0
+
+    def run(self, playouts=None, deadline=None):
+        """Run playouts until the count or the deadline is reached"""
+        while playouts is None or self.playouts < playouts:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            self.playout()
+        return [(child.move, child.visits, child.wins) for child in self.root.children]
+
+    def playout(self):
+        """Select, expand, roll out and back up once"""
+        state = self.state
+        node = self.root
+        undo_stack = []
+
+        while not node.untried and node.children and not state.check_win_condition():
+            node = node.select_child(self.exploration)
+            self.play(node.move, undo_stack)
+
+        if node.untried and not state.check_win_condition():
+            move = node.untried.pop(self.rng.randrange(len(node.untried)))
+            if self.play(move, undo_stack):
+                child = Node(move, node, list(generate_move_array(state, state.current_player)))
+                node.children.append(child)
+                node = child
+
+        rollout_stack = []
+        self.rollout(rollout_stack)
+        winner = self.result()
+        for undo in reversed(rollout_stack):
+            state.switch_player()
+            self.executor.unmake_move(undo)
+
+        # Each node's wins are counted for the player who moved into it
+        while node is not self.root:
+            undo = undo_stack.pop()
+            state.switch_player()
+            self.executor.unmake_move(undo)
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == state.current_player:
+                node.wins += 1.0
+            node = node.parent
+        self.root.visits += 1
+        self.playouts += 1
+
+    def play(self, move, undo_stack):
+        """Make move for the side to move and push its undo record"""
+        try:
+            undo = self.executor.make_move(*decode_move(move, self.state.width))
+        except IndexError:
+            return False
+        self.state.switch_player()
+        undo_stack.append(undo)
+        return True
+
+    def rollout(self, rollout_stack):
+        """Play out the position with the rollout policy"""
+        state = self.state
+        for _ in range(self.max_rollout):
+            if state.check_win_condition():
+                return
+            moves = generate_move_array(state, state.current_player)
+            while moves:
+                pick = self.rng.randrange(len(moves))
+                if self.rollout_policy == 'heuristic':
+                    pick = self.heuristic_pick(moves, pick)
+                move = moves[pick]
+                if self.play(move, rollout_stack):
+                    break
+                moves.pop(pick)
+            else:
+                return
+
+    def heuristic_pick(self, moves, pick):
+        """Among a few sampled moves, prefer the one heading towards a sink"""
+        width = self.state.width
+        distances = self.distances
+        best = pick
+        best_gain = None
+        for _ in range(HEURISTIC_SAMPLES):
+            candidate = self.rng.randrange(len(moves))
+            idx, direction = divmod(moves[candidate], 4)
+            d_row, d_col = DIRECTION_STEPS[direction]
+            target = idx + d_row * width + d_col
+            gain = distances[idx] - distances[target]
+            if best_gain is None or gain > best_gain:
+                best, best_gain = candidate, gain
+        return best
+
+    def result(self):
+        """Winner of a finished rollout, or the side ahead on sunk pieces"""
+        state = self.state
+        winner = state.check_win_condition()
+        if winner:
+            return winner
+        if state.light_sinked_pieces > state.dark_sinked_pieces:
+            return 'light'
+        if state.dark_sinked_pieces > state.light_sinked_pieces:
+            return 'dark'
+        return None
+
+
+def _search_worker(job):
+    """Grow a tree in a pool worker and return the root move statistics"""
+    encoded, root_moves, playouts, time_limit, rollout, seed = job
+    game_state = decode_state(encoded)
+    search = TreeSearch(game_state, root_moves, rollout=rollout, seed=seed)
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    return search.run(playouts, deadline), search.playouts
+
+
+class MCTSPlayer:
+    """Monte Carlo tree search player with root-parallel playouts"""
+
+    def __init__(self, time_limit=1.0, playouts=None, workers=None, rollout='random', seed=None):
+        self.time_limit = time_limit
+        self.playouts = playouts
+        self.workers = workers or os.cpu_count() or 1
+        self.rollout = rollout
+        self.rng = random.Random(seed)
+        self.pool = None
+        self.last_playouts = 0
+
+    def choose_move(self, game_state):
+        """Search the position and return the most visited root move"""
+        root_moves = playable_moves(game_state)
+        if not root_moves:
+            return None
+        if len(root_moves) == 1:
+            return decode_move(root_moves[0], game_state.width)
+
+        if self.workers == 1:
+            search = TreeSearch(game_state, root_moves, rollout=self.rollout,
+                                seed=self.rng.getrandbits(32))
+            deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+            stats = search.run(self.playouts, deadline)
+            self.last_playouts = search.playouts
+        else:
+            stats = self.parallel_search(game_state, root_moves)
+
+        visits = {}
+        for move, count, _ in stats:
+            visits[move] = visits.get(move, 0) + count
+        best = max(root_moves, key=lambda move: visits.get(move, 0))
+        return decode_move(best, game_state.width)
+
+    def parallel_search(self, game_state, root_moves):
+        """Run one tree per worker process and pool their root statistics"""
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.workers)
+        encoded = encode_state(game_state)
+        share = -(-self.playouts // self.workers) if self.playouts else None
+        jobs = [(encoded, root_moves, share, self.time_limit, self.rollout, self.rng.getrandbits(32))
+                for _ in range(self.workers)]
+        stats = []
+        self.last_playouts = 0
+        for worker_stats, playouts in self.pool.map(_search_worker, jobs):
+            stats.extend(worker_stats)
+            self.last_playouts += playouts
+        return stats
+
+    def close(self):
+        """Shut down the worker pool"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
@@ -0,0 +1,60 @@
+"""
+movegen.py
+
+Legal move generation. Moves are (row, col, direction) tuples as read by
+TextGameMode, or in the bulk API a single int per move:
+(row * width + col) * 4 + DIRECTIONS.index(direction).
+"""
+
+from array import array
+
+DIRECTIONS = 'lrud'
+
+
+def encode_move(row, col, direction, width):
+    """Pack a move into a single int"""
+    return (row * width + col) * 4 + DIRECTIONS.index(direction)
+
+
+def decode_move(code, width):
+    """Unpack an int produced by encode_move into (row, col, direction)"""
+    idx, direction = divmod(code, 4)
+    row, col = divmod(idx, width)
+    return row, col, DIRECTIONS[direction]
+
+
+def _legal_directions(validator, table, idx):
+    """Yield the index into DIRECTIONS of every legal move of the piece at idx"""
+    piece = table.anchors[idx]
+    for d in range(4):
+        if validator.is_clear(idx, piece, d):
+            yield d
+
+
+def generate_moves(state, player):
+    """Yield every legal (row, col, direction) for player ('light' or 'dark')"""
+    validator = state.validator
+    table = state.bits.table
+    width = state.width
+    for idx in sorted(state.bits.team_anchors(player)):
+        row, col = divmod(idx, width)
+        for d in _legal_directions(validator, table, idx):
+            yield row, col, DIRECTIONS[d]
+
+
+def generate_move_array(state, player, moves=None):
+    """Return player's legal moves encoded in an array('I').
+
+    Pass a previously returned array as moves to refill it in place.
+    """
+    if moves is None:
+        moves = array('I')
+    else:
+        del moves[:]
+    validator = state.validator
+    table = state.bits.table
+    for idx in sorted(state.bits.team_anchors(player)):
+        base = idx * 4
+        for d in _legal_directions(validator, table, idx):
+            moves.append(base + d)
+    return moves
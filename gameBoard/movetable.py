@@ -0,0 +1,108 @@
+"""
+movetable.py
+
+Precomputed move tables for a board size. For every cell, piece type,
+orientation and direction the table holds the indexes of the cells that
+must be empty for the move and of the cells the piece covers afterwards,
+so validating a move is a lookup plus a test of at most three cells.
+
+Entries for a cell are laid out as slot = type * 8 + lying * 4 + direction,
+with types in 'abcd' order and directions in 'lrud' order. An entry of
+None means the path, or the piece at its destination, leaves the board.
+Like zobrist keys, the entries for a cell are only built the first time
+a move from that cell is looked up.
+"""
+
+PIECE_TYPES = 'abcd'
+DIRECTIONS = 'lrud'
+
+# Cells that must be clear ahead of a piece, as (upright, lying) per direction
+PATH_LENGTHS = {
+    'a': {'r': (1, 1), 'l': (1, 1), 'u': (1, 1), 'd': (1, 1)},
+    'b': {'r': (1, 2), 'l': (1, 2), 'u': (1, 1), 'd': (2, 1)},
+    'c': {'r': (1, 3), 'l': (1, 3), 'u': (1, 1), 'd': (3, 1)},
+    'd': {'r': (2, 2), 'l': (2, 2), 'u': (1, 1), 'd': (2, 2)}
+}
+
+# Offsets of the cells a piece covers from its anchor, as (upright, lying)
+SHAPES = {
+    'a': (((0, 0),), ((0, 0),)),
+    'b': (((0, 0), (1, 0)), ((0, 0), (0, 1))),
+    'c': (((0, 0), (1, 0), (2, 0)), ((0, 0), (0, 1), (0, 2))),
+    'd': (((0, 0), (1, 0), (0, 1), (1, 1)), ((0, 0), (1, 0), (0, 1), (1, 1)))
+}
+
+# Row and column step of each direction
+STEPS = {'l': (0, -1), 'r': (0, 1), 'u': (-1, 0), 'd': (1, 0)}
+
+# First slot of each piece character's entries
+TYPE_SLOTS = {piece: 8 * PIECE_TYPES.index(piece.lower()) for piece in 'abcdABCD'}
+DIRECTION_SLOTS = {direction: d for d, direction in enumerate(DIRECTIONS)}
+
+_tables_by_size = {}
+
+
+def tables_for(height, width):
+    """Return the shared MoveTables for a board size"""
+    tables = _tables_by_size.get((height, width))
+    if tables is None:
+        tables = _tables_by_size[(height, width)] = MoveTables(height, width)
+    return tables
+
+
+class MoveTables:
+    """Path and destination footprint cells per cell, piece type, orientation and direction"""
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.cells = [None] * (height * width)
+
+    def entries(self, idx):
+        """Return (paths, footprints) for moves from cell idx, each a tuple indexed by slot"""
+        entries = self.cells[idx]
+        if entries is None:
+            entries = self.cells[idx] = self.build(idx)
+        return entries
+
+    def paths(self, idx):
+        """Return the path cells for moves from cell idx"""
+        return self.entries(idx)[0]
+
+    def footprints(self, idx):
+        """Return the destination footprint cells for moves from cell idx"""
+        return self.entries(idx)[1]
+
+    def build(self, idx):
+        """Compute the entries for cell idx"""
+        row, col = divmod(idx, self.width)
+        cached = {}
+        paths = []
+        footprints = []
+        for kind in PIECE_TYPES:
+            for lying in (0, 1):
+                for direction in DIRECTIONS:
+                    steps = PATH_LENGTHS[kind][direction][lying]
+                    row_step, col_step = STEPS[direction]
+                    paths.append(self.cell_indexes(cached, tuple(
+                        (row + row_step * n, col + col_step * n) for n in range(1, steps + 1))))
+                    footprints.append(self.cell_indexes(cached, tuple(
+                        (row + row_step + dr, col + col_step + dc) for dr, dc in SHAPES[kind][lying])))
+        return tuple(paths), tuple(footprints)
+
+    def cell_indexes(self, cached, cells):
+        """Return the indexes of cells, or None if any of them is off the board.
+
+        cached holds the entries already built for this cell, since many
+        entries share their cells; equal entries are then the same tuple.
+        """
+        if cells in cached:
+            return cached[cells]
+        indexes = []
+        for row, col in cells:
+            if not (0 <= row < self.height and 0 <= col < self.width):
+                cached[cells] = None
+                return None
+            indexes.append(row * self.width + col)
+        indexes = cached[cells] = tuple(indexes)
+        return indexes
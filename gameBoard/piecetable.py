@@ -0,0 +1,81 @@
+"""
+piecetable.py
+
+Registry of the pieces on a board, keyed by anchor cell. Extension cells
+carry the identifier of the anchor they were laid out from, so the table
+also maps each identifier to the cells that carry it. Every lookup and
+update costs O(piece size) rather than a scan of the board.
+"""
+
+
+class PieceTable:
+    """Pieces keyed by anchor cell and the extension cells each identifier owns"""
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.anchors = {}
+        self.owners = {}
+        self.extensions = {}
+
+    def clear(self):
+        """Forget every piece"""
+        self.anchors.clear()
+        self.owners.clear()
+        self.extensions.clear()
+
+    def add_anchor(self, idx, piece):
+        """Register a piece anchored at idx"""
+        self.anchors[idx] = piece
+
+    def remove_anchor(self, idx):
+        """Drop the piece anchored at idx"""
+        del self.anchors[idx]
+
+    def add_extension(self, idx, identifier):
+        """Register an extension cell carrying identifier"""
+        self.owners[idx] = identifier
+        cells = self.extensions.get(identifier)
+        if cells is None:
+            self.extensions[identifier] = {idx}
+        else:
+            cells.add(idx)
+
+    def remove_extension(self, idx):
+        """Drop the extension cell at idx"""
+        identifier = self.owners.pop(idx)
+        cells = self.extensions[identifier]
+        cells.discard(idx)
+        if not cells:
+            del self.extensions[identifier]
+
+    def extension_cells(self, identifier):
+        """Return the cells carrying identifier"""
+        return self.extensions.get(identifier, ())
+
+    def footprint(self, anchor):
+        """Return the anchor cell followed by its extension cells"""
+        return [anchor] + sorted(self.extension_cells(anchor))
+
+    def team(self, anchor):
+        """Return the team of the piece anchored at anchor"""
+        piece = self.anchors.get(anchor)
+        if piece is None:
+            return None
+        return 'light' if piece.islower() else 'dark'
+
+    def is_upright(self, anchor):
+        """Check if the piece at anchor has no extension to its right or below"""
+        if self.anchors.get(anchor) in ('a', 'A'):
+            return True
+        cells = self.extensions.get(anchor)
+        if not cells:
+            return True
+        row, col = divmod(anchor, self.width)
+        has_right_extension = col + 1 < self.width and anchor + 1 in cells
+        has_down_extension = row + 1 < self.height and anchor + self.width in cells
+        return not (has_right_extension or has_down_extension)
+
+    def orientation(self, anchor):
+        """Return 'upright' or 'lying' for the piece at anchor"""
+        return 'upright' if self.is_upright(anchor) else 'lying'
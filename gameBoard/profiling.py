@@ -0,0 +1,113 @@
+"""
+profiling.py
+
+Opt-in per-phase timing of a game. Set the environment variable
+BOARDGAME_PROFILE before starting gameBoard.py and every phase of a turn
+is counted and timed:
+
+    parse       stdio.readLine and TextGameMode.parse_move
+    validate    MoveValidator.is_valid_move
+    move        MoveExecutor.move_horizontal and move_vertical
+    gravity     MoveExecutor.apply_gravity
+    sinks       MoveExecutor.check_sinks
+    render      BoardPrinter.print_board, GUIGameMode.draw_board and
+                GUIGameMode.update_cells
+
+A summary is written at exit, and on SIGUSR1 where the platform has it,
+to standard error, or as JSON to a file when BOARDGAME_PROFILE is set to
+anything other than 1. When the variable is unset nothing is wrapped, so
+profiling costs nothing.
+"""
+
+import atexit
+import json
+import os
+import signal
+import sys
+import time
+
+ENV_VAR = 'BOARDGAME_PROFILE'
+
+# (class name, method name) per phase; None as the class means a stdio function
+PHASES = {
+    'parse': [(None, 'readLine'), ('TextGameMode', 'parse_move')],
+    'validate': [('MoveValidator', 'is_valid_move')],
+    'move': [('MoveExecutor', 'move_horizontal'), ('MoveExecutor', 'move_vertical')],
+    'gravity': [('MoveExecutor', 'apply_gravity')],
+    'sinks': [('MoveExecutor', 'check_sinks')],
+    'render': [('BoardPrinter', 'print_board'), ('GUIGameMode', 'draw_board'),
+               ('GUIGameMode', 'update_cells')]
+}
+
+# Call count and total nanoseconds per phase
+counters = {phase: [0, 0] for phase in PHASES}
+
+
+def timed(phase, func):
+    """Wrap func so its calls are counted and timed under phase"""
+    counter = counters[phase]
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            counter[0] += 1
+            counter[1] += time.perf_counter_ns() - start
+
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def install(*modules):
+    """Time the phase methods of the classes found in modules, and stdio.readLine.
+
+    Pass the module gameBoard runs as, and gameBoardGUI in GUI mode.
+    """
+    import stdio
+    stdio.readLine = timed('parse', stdio.readLine)
+
+    for phase, methods in PHASES.items():
+        for class_name, name in methods:
+            for module in modules:
+                cls = getattr(module, class_name, None) if class_name else None
+                if cls is None or name not in cls.__dict__:
+                    continue
+                method = cls.__dict__[name]
+                if isinstance(method, staticmethod):
+                    setattr(cls, name, staticmethod(timed(phase, method.__func__)))
+                else:
+                    setattr(cls, name, timed(phase, method))
+
+    atexit.register(dump)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: dump())
+
+
+def summary():
+    """Return the counters as a dict of phase to calls, total and mean time"""
+    return {
+        phase: {
+            'calls': calls,
+            'total_ns': total,
+            'mean_ns': total // calls if calls else 0
+        }
+        for phase, (calls, total) in counters.items()
+    }
+
+
+def dump():
+    """Write the summary where BOARDGAME_PROFILE asks for it"""
+    target = os.environ.get(ENV_VAR)
+    if target and target != '1':
+        with open(target, 'w') as f:
+            json.dump(summary(), f, indent=2)
+        return
+    lines = [f"{'phase':<10}{'calls':>10}{'total ms':>12}{'mean us':>10}"]
+    for phase, entry in summary().items():
+        lines.append(f"{phase:<10}{entry['calls']:>10}{entry['total_ns'] / 1e6:>12.3f}"
+                     f"{entry['mean_ns'] / 1e3:>10.2f}")
+    sys.stderr.write('\n'.join(lines) + '\n')
+    sys.stderr.flush()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Game replay with random access
+Usage: python replay.py <height> <width> <input file> <move number>
+
+Replays a board setup and move list once, keeping a codec snapshot of the
+position every `interval` moves. The position after any move k is then
+rebuilt from the nearest snapshot at or before k, so it costs at most
+`interval` moves rather than a replay from the start.
+
+Moves are applied as TextGameMode applies them: a move that fails
+validation is skipped without passing the turn, and play stops once a
+side has won.
+"""
+
+import sys
+
+from codec import decode_state, encode_state
+from gameBoard import BoardPrinter, BoardReader, GameState
+from gamerecord import record_from_text
+
+DEFAULT_INTERVAL = 32
+
+
+class Replay:
+    """Random access to every position of a recorded game"""
+
+    def __init__(self, height, width, setup, moves, interval=DEFAULT_INTERVAL):
+        self.height = height
+        self.width = width
+        self.interval = interval
+        self.moves = list(moves)
+        self.snapshots = []
+
+        game_state = GameState(height, width)
+        BoardReader(game_state).read_board(setup)
+        self.snapshots.append(encode_state(game_state))
+        self.length = len(self.moves)
+
+        for number in range(len(self.moves)):
+            if not self.apply(game_state, number):
+                self.length = number + 1
+                break
+            if (number + 1) % interval == 0:
+                self.snapshots.append(encode_state(game_state))
+
+    @classmethod
+    def from_record(cls, record, interval=DEFAULT_INTERVAL):
+        """Build a Replay from a gamerecord.GameRecord"""
+        return cls(record.height, record.width, record.setup_lines(),
+                   record.move_tuples(), interval)
+
+    @classmethod
+    def from_text(cls, lines, height, width, interval=DEFAULT_INTERVAL):
+        """Build a Replay from the lines of an input file"""
+        return cls.from_record(record_from_text(lines, height, width), interval)
+
+    def __len__(self):
+        return self.length
+
+    def apply(self, game_state, number):
+        """Apply move number to game_state. Return False once the game is over."""
+        row, col, direction = self.moves[number]
+        valid, _ = game_state.validator.is_valid_move(row, col, direction)
+        if not valid:
+            return True
+        try:
+            game_state.executor.execute_move(row, col, direction)
+        except IndexError:
+            return False
+        if game_state.check_win_condition():
+            return False
+        game_state.switch_player()
+        return True
+
+    def position(self, k):
+        """Return a new GameState for the position after the first k moves"""
+        if not 0 <= k <= self.length:
+            raise IndexError("move number out of range")
+        snapshot = min(k // self.interval, len(self.snapshots) - 1)
+        game_state = decode_state(self.snapshots[snapshot])
+        for number in range(snapshot * self.interval, k):
+            self.apply(game_state, number)
+        return game_state
+
+
+def print_usage():
+    print("Usage: python replay.py <height> <width> <input file> <move number>")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 5:
+        print_usage()
+        sys.exit(1)
+
+    try:
+        height = int(sys.argv[1])
+        width = int(sys.argv[2])
+        k = int(sys.argv[4])
+    except ValueError:
+        print_usage()
+        sys.exit(1)
+
+    with open(sys.argv[3]) as f:
+        replay = Replay.from_text(f, height, width)
+    if not 0 <= k <= len(replay):
+        print(f"ERROR: Move number must be between 0 and {len(replay)}")
+        sys.exit(1)
+
+    game_state = replay.position(k)
+    BoardPrinter.print_board(game_state.board, game_state.bits)
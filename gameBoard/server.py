@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Game server
+Usage: python server.py [--host HOST] [--port PORT]
+
+Hosts any number of games in one asyncio process. A connection opens
+with one command line:
+
+    new <height> <width>    followed by board setup lines up to '#',
+                            as in an input file, at most one per cell;
+                            starts a game as light
+    join <game>             joins a game as dark, or as a spectator once
+                            both sides are taken
+
+The server answers with "game <id> <side>" and the board. From then on
+a player sends moves as "row col dir", exactly as in text mode, and
+every connection in the game is sent the board after each move,
+followed by "Next player: ..." or "... wins". Errors are sent only to
+the connection that caused them, as "ERROR: ..." lines. A connection
+that stops reading board updates is dropped.
+"""
+
+import argparse
+import asyncio
+import itertools
+import sys
+
+from gameBoard import BoardPrinter, BoardReader, GameState, MAX_BOARD_SIZE, MIN_BOARD_SIZE
+
+SIDES = ('light', 'dark')
+
+# Seconds a connection may take to accept a board update before it is dropped
+DRAIN_TIMEOUT = 5.0
+
+
+class Session:
+    """One game and the connections following it"""
+
+    def __init__(self, game_id, game_state):
+        self.game_id = game_id
+        self.game_state = game_state
+        self.validator = game_state.validator
+        self.executor = game_state.executor
+        self.players = {}
+        self.writers = []
+        self.winner = None
+
+    def add(self, writer):
+        """Attach a connection and return the side it plays, or 'spectator'"""
+        self.writers.append(writer)
+        for side in SIDES:
+            if side not in self.players:
+                self.players[side] = writer
+                return side
+        return 'spectator'
+
+    def remove(self, writer):
+        """Detach a connection"""
+        self.writers.remove(writer)
+        for side, player in list(self.players.items()):
+            if player is writer:
+                del self.players[side]
+
+    def board(self):
+        """The board as text mode prints it"""
+        return BoardPrinter.render_board(self.game_state.board, self.game_state.bits)
+
+    async def play(self, writer, line):
+        """Apply a move line from writer. Return an error message, or None."""
+        if self.winner:
+            return "ERROR: Game over"
+        if self.players.get(self.game_state.current_player) is not writer:
+            return "ERROR: Not your turn"
+
+        move = line.split()
+        if len(move) != 3:
+            return "ERROR: Invalid move format"
+        try:
+            row = int(move[0])
+            col = int(move[1])
+            action = move[2]
+        except ValueError:
+            return "ERROR: Invalid move format"
+
+        valid, message = self.validator.is_valid_move(row, col, action)
+        if not valid:
+            return f"ERROR: {message}"
+        try:
+            self.executor.make_move(row, col, action)
+        except IndexError:
+            # make_move has rolled the board back
+            return "ERROR: Piece would leave the board"
+
+        update = self.board()
+        self.winner = self.game_state.check_win_condition()
+        if self.winner:
+            update += f"{self.winner.capitalize()} wins\n"
+        else:
+            self.game_state.switch_player()
+            update += f"Next player: {self.game_state.current_player}\n"
+        await self.broadcast(update)
+        return None
+
+    async def broadcast(self, text):
+        """Send text to every connection in the game and wait until each has taken it.
+
+        A connection that does not catch up within DRAIN_TIMEOUT is closed,
+        so a stalled client cannot buffer updates without limit.
+        """
+        data = text.encode()
+        for writer in self.writers:
+            writer.write(data)
+        await asyncio.gather(*(self.drain(writer) for writer in list(self.writers)))
+
+    @staticmethod
+    async def drain(writer):
+        """Wait for writer's buffer to empty, closing it if it takes too long"""
+        try:
+            await asyncio.wait_for(writer.drain(), DRAIN_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError):
+            # Abort rather than close, which would wait to flush the backlog
+            writer.transport.abort()
+
+
+class GameServer:
+    """Accepts connections and routes their lines to game sessions"""
+
+    def __init__(self):
+        self.sessions = {}
+        self.ids = itertools.count(1)
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start listening and return the asyncio server"""
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader, writer):
+        """Serve one connection until it closes"""
+        session = None
+        try:
+            session = await self.open_session(reader, writer)
+            if session is None:
+                return
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode().strip()
+                if not line:
+                    continue
+                error = await session.play(writer, line)
+                if error:
+                    writer.write(f"{error}\n".encode())
+                await writer.drain()
+        except (ConnectionError, UnicodeDecodeError, ValueError):
+            # ValueError is readline's answer to a line over the stream limit
+            pass
+        finally:
+            if session is not None:
+                session.remove(writer)
+                if not session.writers:
+                    del self.sessions[session.game_id]
+            writer.close()
+
+    async def open_session(self, reader, writer):
+        """Read the opening command and return the session it attaches to"""
+        command = (await reader.readline()).decode().split()
+        if len(command) == 3 and command[0] == 'new':
+            session = await self.new_session(reader, command[1], command[2])
+            if session is None:
+                writer.write(b"ERROR: Invalid board\n")
+        elif len(command) == 2 and command[0] == 'join':
+            session = self.sessions.get(int(command[1])) if command[1].isdigit() else None
+            if session is None:
+                writer.write(b"ERROR: No such game\n")
+        else:
+            session = None
+            writer.write(b"ERROR: Expected 'new <height> <width>' or 'join <game>'\n")
+
+        if session is None:
+            await writer.drain()
+            return None
+
+        side = session.add(writer)
+        writer.write(f"game {session.game_id} {side}\n".encode())
+        writer.write(session.board().encode())
+        await writer.drain()
+        return session
+
+    async def new_session(self, reader, height, width):
+        """Read a board setup and start a game on it, or return None"""
+        try:
+            height = int(height)
+            width = int(width)
+        except ValueError:
+            return None
+        if not (MIN_BOARD_SIZE <= height <= MAX_BOARD_SIZE and MIN_BOARD_SIZE <= width <= MAX_BOARD_SIZE):
+            return None
+
+        # Lay the board out line by line, so a setup costs no more memory than its board
+        game_state = GameState(height, width)
+        board_reader = BoardReader(game_state)
+        for _ in range(height * width + 1):
+            line = await reader.readline()
+            if not line:
+                return None
+            line = line.decode()
+            if line.strip() == '#':
+                game_id = next(self.ids)
+                session = self.sessions[game_id] = Session(game_id, game_state)
+                return session
+            if board_reader.parse_line(line.split()):
+                return None
+        # More setup lines than the board has cells
+        return None
+
+
+async def serve(host, port):
+    """Run a GameServer until cancelled"""
+    server = await GameServer().start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Serving on {address[0]}:{address[1]}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Serve many concurrent games over TCP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
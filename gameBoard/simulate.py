@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Headless batch simulator
+Usage: python simulate.py <height> <width> <setup file> [options]
+
+Plays many complete engine-vs-engine games from one board setup across
+worker processes, without printing boards, and writes aggregate results
+as JSON.
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+
+import engine
+from gameBoard import BORDER_WIDTH, BoardReader, GameState
+
+
+class SimulationConfig:
+    """Board size, border widths, setup lines and move cap shared by every simulated game"""
+
+    def __init__(self, height, width, setup, max_moves=200,
+                 sink_border=BORDER_WIDTH, piece_border=BORDER_WIDTH):
+        self.height = height
+        self.width = width
+        self.setup = [line.rstrip('\n') for line in setup]
+        self.max_moves = max_moves
+        self.sink_border = sink_border
+        self.piece_border = piece_border
+
+    @classmethod
+    def from_file(cls, height, width, path, max_moves=200,
+                  sink_border=BORDER_WIDTH, piece_border=BORDER_WIDTH):
+        """Read the setup lines, up to the closing '#', from an input file"""
+        setup = []
+        with open(path) as f:
+            for line in f:
+                line = line.rstrip('\n')
+                setup.append(line)
+                if line == '#':
+                    break
+        return cls(height, width, setup, max_moves, sink_border, piece_border)
+
+
+def _make_player(name, seed):
+    """Create a single-process engine player for a simulated game"""
+    if name == 'alphabeta':
+        return engine.create_player(name)
+    if name == 'mcts':
+        return engine.create_player(name, seed=seed, workers=1)
+    return engine.create_player(name, seed=seed)
+
+
+def play_game(config, players, seed=None):
+    """Play one game between two named engines and return its result"""
+    game_state = GameState(config.height, config.width, config.sink_border, config.piece_border)
+    BoardReader(game_state).read_board(config.setup)
+    executor = game_state.executor
+    engines = {
+        'light': _make_player(players['light'], seed),
+        'dark': _make_player(players['dark'], None if seed is None else seed + 1)
+    }
+
+    winner = None
+    moves = 0
+    while moves < config.max_moves:
+        move = engines[game_state.current_player].choose_move(game_state)
+        if move is None:
+            break
+        executor.execute_move(*move)
+        moves += 1
+        winner = game_state.check_win_condition()
+        if winner:
+            break
+        game_state.switch_player()
+
+    return {
+        'winner': winner,
+        'moves': moves,
+        'light_sunk': game_state.light_sinked_pieces,
+        'dark_sunk': game_state.dark_sinked_pieces
+    }
+
+
+def _play_job(job):
+    """Pool entry point for play_game"""
+    config, players, seed = job
+    return play_game(config, players, seed)
+
+
+def summarize(results):
+    """Aggregate a list of play_game results"""
+    games = len(results)
+    wins = {'light': 0, 'dark': 0, 'draw': 0}
+    for result in results:
+        wins[result['winner'] or 'draw'] += 1
+    lengths = [result['moves'] for result in results]
+    return {
+        'games': games,
+        'wins': wins,
+        'win_rates': {side: count / games for side, count in wins.items()} if games else {},
+        'mean_length': sum(lengths) / games if games else 0,
+        'min_length': min(lengths, default=0),
+        'max_length': max(lengths, default=0),
+        'mean_light_sunk': sum(result['light_sunk'] for result in results) / games if games else 0,
+        'mean_dark_sunk': sum(result['dark_sunk'] for result in results) / games if games else 0
+    }
+
+
+def simulate(config, players, n_games, workers=1, seed=0):
+    """Play n_games across workers processes and return aggregate results"""
+    jobs = [(config, players, seed + 2 * game) for game in range(n_games)]
+    if workers <= 1:
+        results = [_play_job(job) for job in jobs]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            chunksize = max(1, n_games // (workers * 4))
+            results = list(pool.imap_unordered(_play_job, jobs, chunksize))
+    summary = summarize(results)
+    summary['players'] = dict(players)
+    return summary
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Run many headless games and report aggregate results")
+    parser.add_argument('height', type=int)
+    parser.add_argument('width', type=int)
+    parser.add_argument('setup', help="input file whose board setup every game starts from")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--light', default='random')
+    parser.add_argument('--dark', default='random')
+    parser.add_argument('--max-moves', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sink-border', type=int, default=BORDER_WIDTH)
+    parser.add_argument('--piece-border', type=int, default=BORDER_WIDTH)
+    args = parser.parse_args(argv)
+
+    for name in (args.light, args.dark):
+        if name == 'human' or (name not in engine.ENGINES and name != 'mcts'):
+            parser.error(f"unknown engine: {name}")
+
+    config = SimulationConfig.from_file(args.height, args.width, args.setup, args.max_moves,
+                                        args.sink_border, args.piece_border)
+    summary = simulate(config, {'light': args.light, 'dark': args.dark},
+                       args.games, args.workers, args.seed)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
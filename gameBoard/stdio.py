@@ -17,6 +17,8 @@ functions:
 Usually it's better to use one set exclusively.
 """
     
+import codecs
+import io
 import sys
 import re
 import unicodedata
@@ -35,6 +37,31 @@ else:
 # Writing functions
 #=======================================================================
 
+_autoFlush = True
+
+#-----------------------------------------------------------------------
+
+def setBuffered(buffered=True):
+    """
+    Turn buffered output on or off. While output is buffered, the
+    writing functions no longer flush standard output after every
+    call; call flush() once a complete frame has been written.
+    """
+    global _autoFlush
+    _autoFlush = not buffered
+    if not buffered:
+        sys.stdout.flush()
+
+#-----------------------------------------------------------------------
+
+def flush():
+    """
+    Flush standard output.
+    """
+    sys.stdout.flush()
+
+#-----------------------------------------------------------------------
+
 def writeln(x=''):
     """
     Write x and an end-of-line mark to standard output.
@@ -44,9 +71,9 @@ def writeln(x=''):
         x = x.encode('utf-8')
     else:
         x = str(x)
-    sys.stdout.write(x)
-    sys.stdout.write('\n')
-    sys.stdout.flush()
+    sys.stdout.write(x + '\n')
+    if _autoFlush:
+        sys.stdout.flush()
 
 #-----------------------------------------------------------------------
 
@@ -60,7 +87,8 @@ def write(x=''):
     else:
         x = str(x)
     sys.stdout.write(x)
-    sys.stdout.flush()
+    if _autoFlush:
+        sys.stdout.flush()
 
 #-----------------------------------------------------------------------
 
@@ -74,34 +102,133 @@ def writef(fmt, *args):
         x = str(x)
         x = x.encode('utf-8')
     sys.stdout.write(x)
-    sys.stdout.flush()
+    if _autoFlush:
+        sys.stdout.flush()
 
 #=======================================================================
 # Reading functions
 #=======================================================================
 
+# Standard input is read in chunks of this many bytes. The unread part
+# of the buffer is _buffer[_pos:]. Consumed text is dropped only once the
+# cursor is past half the buffer, and lines or whole inputs that span
+# chunks are gathered in a list and joined once, so every read is linear
+# in its size.
+
+_CHUNK_SIZE = 1 << 16
+
 _buffer = ''
+_pos = 0
+_eof = False
+_stream = None
+_decoder = None
+
+_WHITESPACE = re.compile(r'\s*')
+_NON_WHITESPACE = re.compile(r'\S')
+_TOKEN = re.compile(r'\S+')
+_TOKEN_END = re.compile(r'\s')
+_INT = re.compile(r'[-+]?(0[xX][\dA-Fa-f]+|0[0-7]*|\d+)')
+_FLOAT = re.compile(r'[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?')
+_BOOL = re.compile(r'(True)|(False)|1|0')
+
+#-----------------------------------------------------------------------
+
+def _reset():
+    """
+    Forget everything buffered from standard input. Call after
+    replacing sys.stdin.
+    """
+    global _buffer, _pos, _eof, _stream, _decoder
+    _buffer = ''
+    _pos = 0
+    _eof = False
+    _stream = None
+    _decoder = None
+
+#-----------------------------------------------------------------------
+
+def _readChunk():
+    """
+    Read the next chunk of standard input. Return the text read and
+    whether the end of standard input has been reached. Returns as
+    soon as some input is available, so interactive input is not held
+    back waiting for a full chunk.
+    """
+    global _stream, _decoder
+    if _stream is not sys.stdin:
+        _stream = sys.stdin
+        _decoder = None
+    raw = getattr(_stream, 'buffer', None)
+    if raw is not None and hasattr(raw, 'read1'):
+        if _decoder is None:
+            encoding = getattr(_stream, 'encoding', None) or 'utf-8'
+            _decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder(encoding)(), translate=True)
+        data = raw.read1(_CHUNK_SIZE)
+        return _decoder.decode(data, final=not data), not data
+    text = _stream.read(_CHUNK_SIZE)
+    if sys.hexversion < 0x03000000:
+        text = text.decode('utf-8')
+    return text, text == ''
+
+#-----------------------------------------------------------------------
+
+def _nextChunk():
+    """
+    Return the next non-empty chunk of standard input, or '' if
+    standard input is exhausted.
+    """
+    global _eof
+    while not _eof:
+        text, _eof = _readChunk()
+        if text:
+            return text
+    return ''
+
+#-----------------------------------------------------------------------
+
+def _fill():
+    """
+    Append the next chunk of standard input to the buffer. Return
+    False if standard input is exhausted.
+    """
+    global _buffer, _pos
+    text = _nextChunk()
+    if not text:
+        return False
+    if _pos > len(_buffer) // 2:
+        _buffer = _buffer[_pos:] + text
+        _pos = 0
+    else:
+        _buffer += text
+    return True
 
 #-----------------------------------------------------------------------
 
 def _readRegExp(regExp):
     """
     Discard leading white space characters from standard input. Then read
-    from standard input and return a string matching regular expression
-    regExp.  Raise an EOFError if no non-whitespace characters remain
-    in standard input.  Raise a ValueError if the next characters to
-    be read from standard input do not match 'regExp'.
+    from standard input and return a string matching the compiled
+    regular expression regExp.  Raise an EOFError if no non-whitespace
+    characters remain in standard input.  Raise a ValueError if the next
+    characters to be read from standard input do not match 'regExp'.
     """
-    global _buffer
+    global _pos
     if isEmpty():
         raise EOFError()
-    compiledRegExp = re.compile(r'^\s*' + regExp)
-    match = compiledRegExp.search(_buffer)
+    # The token starts skip characters after _pos; _fill keeps that true
+    # when it drops consumed text. _pos itself only moves past the
+    # white space once the token has matched, so a failed read consumes
+    # nothing.
+    skip = _WHITESPACE.match(_buffer, _pos).end() - _pos
+    # Make sure the whole token is buffered before matching it
+    while _TOKEN_END.search(_buffer, _pos + skip) is None and _fill():
+        pass
+    match = regExp.match(_buffer, _pos + skip)
     if match is None:
         raise ValueError()
-    s = match.group()
-    _buffer = _buffer[match.end():]
-    return s.lstrip()
+    _pos = match.end()
+    return match.group()
 
 #-----------------------------------------------------------------------
 
@@ -110,14 +237,9 @@ def isEmpty():
     Return True if no non-whitespace characters remain in standard
     input. Otherwise return False.
     """
-    global _buffer
-    while _buffer.strip() == '':
-        line = sys.stdin.readline()
-        if sys.hexversion < 0x03000000:
-            line = line.decode('utf-8')
-        if line == '':
+    while _NON_WHITESPACE.search(_buffer, _pos) is None:
+        if not _fill():
             return True
-        _buffer += line
     return False
 
 #-----------------------------------------------------------------------
@@ -132,7 +254,7 @@ def readInt():
     next characters to be read from standard input cannot comprise
     an integer.
     """
-    s = _readRegExp(r'[-+]?(0[xX][\dA-Fa-f]+|0[0-7]*|\d+)')
+    s = _readRegExp(_INT)
     radix = 10
     strLength = len(s)
     if (strLength >= 1) and (s[0:1] == '0'): radix = 8
@@ -151,12 +273,18 @@ def readAllInts():
     an int, and return those ints in an array. Raise a ValueError if
     any of the strings cannot be converted to an int.
     """
-    strings = readAllStrings()
-    ints = []
-    for s in strings:
-        i = int(s)
-        ints.append(i)
-    return ints
+    return list(iterInts())
+
+#-----------------------------------------------------------------------
+
+def iterInts():
+    """
+    Generate the remaining strings from standard input, each converted
+    to an int, reading standard input a chunk at a time. Raise a
+    ValueError if a string cannot be converted to an int.
+    """
+    for s in iterStrings():
+        yield int(s)
 
 #-----------------------------------------------------------------------
 
@@ -169,7 +297,7 @@ def readFloat():
     in standard input. Raise a ValueError if the next characters to be
     read from standard input cannot comprise a float.
     """
-    s = _readRegExp(r'[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?')
+    s = _readRegExp(_FLOAT)
     return float(s)
 
 #-----------------------------------------------------------------------
@@ -180,12 +308,7 @@ def readAllFloats():
     a float, and return those floats in an array. Raise a ValueError if
     any of the strings cannot be converted to a float.
     """
-    strings = readAllStrings()
-    floats = []
-    for s in strings:
-        f = float(s)
-        floats.append(f)
-    return floats
+    return [float(s) for s in iterStrings()]
 
 #-----------------------------------------------------------------------
 
@@ -204,7 +327,7 @@ def readBool():
     -- 1 (means true)
     -- 0 (means false)
     """
-    s = _readRegExp(r'(True)|(False)|1|0')
+    s = _readRegExp(_BOOL)
     if (s == 'True') or (s == '1'):
         return True
     return False
@@ -217,12 +340,7 @@ def readAllBools():
     a bool, and return those bools in an array. Raise a ValueError if
     any of the strings cannot be converted to a bool.
     """
-    strings = readAllStrings()
-    bools = []
-    for s in strings:
-        b = bool(s)
-        bools.append(b)
-    return bools
+    return [bool(s) for s in iterStrings()]
 
 #-----------------------------------------------------------------------
 
@@ -233,7 +351,7 @@ def readString():
     string, and return the string. Raise an EOFError if no
     non-whitespace characters remain in standard input.
     """
-    s = _readRegExp(r'\S+')
+    s = _readRegExp(_TOKEN)
     return s
 
 #-----------------------------------------------------------------------
@@ -243,11 +361,35 @@ def readAllStrings():
     Read all remaining strings from standard input, and return them in
     an array.
     """
-    strings = []
-    while not isEmpty():
-        s = readString()
-        strings.append(s)
-    return strings
+    return list(iterStrings())
+
+#-----------------------------------------------------------------------
+
+def iterStrings():
+    """
+    Generate the remaining strings from standard input, reading
+    standard input a chunk at a time.
+    """
+    global _pos
+    while True:
+        buffer = _buffer
+        for match in _TOKEN.finditer(buffer, _pos):
+            # A token running to the end of the buffer may continue in
+            # the next chunk
+            if match.end() == len(buffer) and not _eof:
+                break
+            _pos = match.end()
+            yield match.group()
+            if _buffer is not buffer:
+                break
+        else:
+            if not _fill():
+                return
+            continue
+        if _buffer is buffer and not _fill():
+            if _pos < len(_buffer):
+                continue
+            return
 
 #-----------------------------------------------------------------------
 
@@ -256,16 +398,7 @@ def hasNextLine():
     Return True if standard input has a next line. Otherwise return
     False.
     """
-    global _buffer
-    if _buffer != '':
-        return True
-    else:
-        _buffer = sys.stdin.readline()
-        if sys.hexversion < 0x03000000:
-            _buffer = _buffer.decode('utf-8')
-        if _buffer == '':
-            return False
-        return True
+    return _pos < len(_buffer) or _fill()
 
 #-----------------------------------------------------------------------
 
@@ -274,12 +407,29 @@ def readLine():
     Read and return as a string the next line of standard input.
     Raise an EOFError is there is no next line.
     """
-    global _buffer
+    global _buffer, _pos
     if not hasNextLine():
         raise EOFError()
-    s = _buffer
+    end = _buffer.find('\n', _pos)
+    if end >= 0:
+        s = _buffer[_pos:end]
+        _pos = end + 1
+        return s
+    # The line runs past the buffer: gather its chunks and join them once
+    chunks = [_buffer[_pos:]]
     _buffer = ''
-    return s.rstrip('\n')
+    _pos = 0
+    while True:
+        text = _nextChunk()
+        if not text:
+            return ''.join(chunks)
+        end = text.find('\n')
+        if end >= 0:
+            chunks.append(text[:end])
+            _buffer = text
+            _pos = end + 1
+            return ''.join(chunks)
+        chunks.append(text)
 
 #-----------------------------------------------------------------------
 
@@ -288,11 +438,17 @@ def readAllLines():
     Read all remaining lines from standard input, and return them as
     strings in an array.
     """
-    lines = []
+    return list(iterLines())
+
+#-----------------------------------------------------------------------
+
+def iterLines():
+    """
+    Generate the remaining lines from standard input, reading standard
+    input a chunk at a time.
+    """
     while hasNextLine():
-        line = readLine()
-        lines.append(line)
-    return lines
+        yield readLine()
 
 #-----------------------------------------------------------------------
 
@@ -300,14 +456,15 @@ def readAll():
     """
     Read and return as a string all remaining lines of standard input.
     """
-    global _buffer
-    s = _buffer
+    global _buffer, _pos
+    chunks = [_buffer[_pos:]]
     _buffer = ''
-    for line in sys.stdin:
-        if sys.hexversion < 0x03000000:
-            line = line.decode('utf-8')
-        s += line
-    return s
+    _pos = 0
+    while True:
+        text = _nextChunk()
+        if not text:
+            return ''.join(chunks)
+        chunks.append(text)
 
 #=======================================================================
 # For Testing
@@ -0,0 +1,81 @@
+"""
+zobrist.py
+
+Zobrist keys for 64-bit position hashes. Every key is derived from the
+board size and its own slot number, so keys are the same in every process
+and are only computed the first time they are needed.
+"""
+
+MASK64 = (1 << 64) - 1
+
+# Slot of each cell value within a cell's block of keys
+CELL_CODES = {'a': 0, 'b': 1, 'c': 2, 'd': 3,
+              'A': 4, 'B': 5, 'C': 6, 'D': 7,
+              's': 8, 'x': 9}
+CODES_PER_CELL = 10
+
+# Blocks of area slots before the extension keys: the cell values, then
+# the side to move and the sink counters
+EXTENSION_BLOCK = CODES_PER_CELL + 4
+
+_keys_by_size = {}
+
+
+def _mix(x):
+    """splitmix64 finaliser"""
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def keys_for(height, width):
+    """Return the shared ZobristKeys for a board size"""
+    keys = _keys_by_size.get((height, width))
+    if keys is None:
+        keys = _keys_by_size[(height, width)] = ZobristKeys(height, width)
+    return keys
+
+
+class ZobristKeys:
+    """64-bit keys for every cell value, the side to move and the sink counters"""
+
+    def __init__(self, height, width):
+        self.area = height * width
+        self.seed = _mix((height << 32) | width)
+        self.cells = [0] * (self.area * CODES_PER_CELL)
+        # Extension keys by idx * area + identifier, built as they are met
+        self.extensions = {}
+        self.dark_to_move = self._key(self.area * (CODES_PER_CELL + 1))
+
+    def _key(self, slot):
+        """Key for a slot number"""
+        return _mix(self.seed ^ slot)
+
+    def cell_key(self, idx, value):
+        """Key for value standing on cell idx"""
+        code = CELL_CODES.get(value)
+        if code is None:
+            # An extension cell has its own key for every identifier it can carry
+            slot = idx * self.area + int(value)
+            key = self.extensions.get(slot)
+            if key is None:
+                key = self.extensions[slot] = self._key(self.area * EXTENSION_BLOCK + slot)
+            return key
+        slot = idx * CODES_PER_CELL + code
+        key = self.cells[slot]
+        if not key:
+            key = self.cells[slot] = self._key(slot)
+        return key
+
+    def sunk_key(self, team, count):
+        """Key for a team's sink counter standing at count"""
+        offset = 2 * count + (1 if team == 'dark' else 0)
+        return self._key(self.area * (CODES_PER_CELL + 1) + 1 + offset)
+
+    def position_key(self, player, light_sunk, dark_sunk):
+        """Key for everything in a position except the board itself"""
+        key = self.sunk_key('light', light_sunk) ^ self.sunk_key('dark', dark_sunk)
+        if player == 'dark':
+            key ^= self.dark_to_move
+        return key
@@ -0,0 +1,13 @@
+import os
+import sys
+
+# The game modules import each other by plain name, as when run from gameBoard/
+GAME_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gameBoard')
+sys.path.insert(0, GAME_DIR)
+
+# stdio reopens standard input by file descriptor when it is first imported,
+# which pytest's captured stdin does not allow
+_captured_stdin = sys.stdin
+sys.stdin = sys.__stdin__
+import stdio  # noqa: E402,F401
+sys.stdin = _captured_stdin
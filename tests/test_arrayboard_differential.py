@@ -0,0 +1,78 @@
+"""Batch legality and moves must match MoveValidator and MoveExecutor on every board"""
+
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from arrayboard import BoardBatch  # noqa: E402
+from benchmark import scaled_setup  # noqa: E402
+from engine import playable_moves  # noqa: E402
+from gameBoard import BoardReader, GameState  # noqa: E402
+from movegen import DIRECTIONS, decode_move  # noqa: E402
+
+GAMES = 20
+BOARDS = 4
+MAX_MOVES = 60
+
+
+def expected_legal_moves(game_state, to_move):
+    """The [H, W, 4] legality mask built from is_valid_move, cell by cell"""
+    validator = game_state.validator
+    legal = np.zeros((game_state.height, game_state.width, len(DIRECTIONS)), dtype=bool)
+    for row in range(game_state.height):
+        for col in range(game_state.width):
+            piece = game_state.board[row][col]
+            if to_move and piece in 'abcdABCD' and (piece in 'abcd') != (game_state.current_player == 'light'):
+                continue
+            for d, direction in enumerate(DIRECTIONS):
+                legal[row, col, d] = validator.is_valid_move(row, col, direction)[0]
+    return legal
+
+
+def assert_batch_matches(batch, states):
+    for to_move in (False, True):
+        legal = batch.legal_moves(to_move)
+        for n, game_state in enumerate(states):
+            np.testing.assert_array_equal(legal[n], expected_legal_moves(game_state, to_move))
+    for game_state, settled in zip(states, batch.to_states()):
+        assert settled.board == game_state.board
+        assert settled.light_sinked_pieces == game_state.light_sinked_pieces
+        assert settled.dark_sinked_pieces == game_state.dark_sinked_pieces
+
+
+@pytest.mark.parametrize('seed', range(GAMES))
+def test_batch_matches_rules(seed):
+    rng = random.Random(seed)
+    size = rng.choice([8, 9, 10, 12, 16])
+    states = []
+    for n in range(BOARDS):
+        game_state = GameState(size, size)
+        BoardReader(game_state).read_board(
+            scaled_setup(size, size, pieces=rng.randint(2, 6), seed=seed * BOARDS + n))
+        # Settle first, so the batch starts from the boards the rules play on
+        game_state.executor.settle()
+        states.append(game_state)
+    batch = BoardBatch.from_states(states)
+    assert_batch_matches(batch, states)
+
+    for _ in range(MAX_MOVES):
+        rows = [-1] * BOARDS
+        cols = [-1] * BOARDS
+        directions = [0] * BOARDS
+        for n, game_state in enumerate(states):
+            moves = playable_moves(game_state)
+            if not moves or game_state.check_win_condition():
+                continue
+            row, col, direction = decode_move(rng.choice(moves), size)
+            game_state.executor.make_move(row, col, direction)
+            game_state.switch_player()
+            rows[n], cols[n], directions[n] = row, col, DIRECTIONS.index(direction)
+        if rows == [-1] * BOARDS:
+            break
+
+        moved = batch.apply_moves(rows, cols, directions)
+        np.testing.assert_array_equal(moved, np.array(rows) >= 0)
+        batch.dark_to_move ^= moved
+        assert_batch_matches(batch, states)
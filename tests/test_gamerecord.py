@@ -0,0 +1,24 @@
+"""Game records must hold every setup value they accept, and refuse the rest"""
+
+import pytest
+
+from gameBoard import SetupError
+from gamerecord import GameRecordFile, GameRecordWriter, record_from_text
+
+EDGE_SETUP = ["s 255 9 0", "x -32768 32767", "l a 5 5", "#", "5 5 r"]
+
+
+def test_values_at_the_edges_round_trip(tmp_path):
+    path = tmp_path / 'edge.bgr'
+    with GameRecordWriter(path) as writer:
+        writer.write_game(record_from_text(EDGE_SETUP, 10, 10))
+    with GameRecordFile(path) as records:
+        text = records[0].to_text()
+    assert text.splitlines() == EDGE_SETUP
+
+
+@pytest.mark.parametrize('line', ["s 256 9 0", "s -1 9 0", "l Ā 5 5", "x 32768 0", "d a 5 -32769"])
+def test_values_out_of_range_are_refused(line):
+    with pytest.raises(SetupError) as error:
+        record_from_text(["s 1 9 0", line, "#"], 10, 10)
+    assert error.value.line_number == 2
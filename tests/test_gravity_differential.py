@@ -0,0 +1,64 @@
+"""Incremental settling must match a full scan of the board after every move"""
+
+import random
+
+import pytest
+
+from benchmark import scaled_setup
+from engine import playable_moves
+from gameBoard import BoardReader, GameState, Piece
+from movegen import decode_move
+
+GAMES = 40
+MAX_MOVES = 80
+
+
+def full_scan_settle(board, sunk):
+    """Gravity then sinks over every cell, as the rules were first written"""
+    height = len(board)
+    width = len(board[0])
+    for col in range(width):
+        for row in range(height - 2, -1, -1):
+            piece = board[row][col]
+            if Piece.is_valid_piece(piece):
+                target_row = row
+                while target_row + 1 < height and board[target_row + 1][col] == ' ':
+                    target_row += 1
+                if target_row != row:
+                    board[row][col] = ' '
+                    board[target_row][col] = piece
+
+    for row in range(1, height):
+        for col in range(width):
+            if board[row][col] == 's' and Piece.is_valid_piece(board[row - 1][col]):
+                sunk[Piece.get_team(board[row - 1][col])] += 1
+                board[row - 1][col] = ' '
+
+
+@pytest.mark.parametrize('seed', range(GAMES))
+def test_settle_matches_full_scan(seed):
+    rng = random.Random(seed)
+    size = rng.choice([8, 9, 10, 12, 16])
+    game_state = GameState(size, size)
+    BoardReader(game_state).read_board(scaled_setup(size, size, pieces=rng.randint(2, 6), seed=seed))
+    executor = game_state.executor
+
+    for _ in range(MAX_MOVES):
+        moves = playable_moves(game_state)
+        if not moves or game_state.check_win_condition():
+            break
+        row, col, direction = decode_move(rng.choice(moves), size)
+        if direction in 'lr':
+            executor.move_horizontal(row, col, direction)
+        else:
+            executor.move_vertical(row, col, direction)
+
+        expected = [list(cells) for cells in game_state.board]
+        sunk = {'light': game_state.light_sinked_pieces, 'dark': game_state.dark_sinked_pieces}
+        full_scan_settle(expected, sunk)
+
+        executor.settle()
+        assert game_state.board == expected
+        assert game_state.light_sinked_pieces == sunk['light']
+        assert game_state.dark_sinked_pieces == sunk['dark']
+        game_state.switch_player()
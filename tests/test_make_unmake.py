@@ -0,0 +1,67 @@
+"""unmake_move must restore the exact position, and the incremental hash must match a fresh one"""
+
+import random
+
+import pytest
+
+from benchmark import scaled_setup
+from bitboard import BitBoard
+from gameBoard import BoardReader, GameState
+from movegen import decode_move, generate_move_array
+
+WALKS = 30
+STEPS = 200
+
+
+def snapshot(game_state):
+    """Everything make_move may change"""
+    return ([list(cells) for cells in game_state.board],
+            game_state.light_sinked_pieces,
+            game_state.dark_sinked_pieces,
+            game_state.position_hash())
+
+
+def assert_hash_is_fresh(game_state):
+    """The incrementally updated hash must equal one computed from scratch"""
+    assert game_state.bits.hash == BitBoard([list(cells) for cells in game_state.board]).hash
+
+
+@pytest.mark.parametrize('seed', range(WALKS))
+def test_unmake_restores_position(seed):
+    rng = random.Random(seed)
+    size = rng.choice([8, 9, 10, 12, 16])
+    game_state = GameState(size, size)
+    BoardReader(game_state).read_board(scaled_setup(size, size, pieces=rng.randint(2, 6), seed=seed))
+    executor = game_state.executor
+
+    # A random walk down and back up the game tree, as a search makes and unmakes moves
+    stack = []
+    for _ in range(STEPS):
+        moves = generate_move_array(game_state, game_state.current_player)
+        if stack and (not moves or game_state.check_win_condition() or rng.random() < 0.4):
+            undo, before = stack.pop()
+            game_state.switch_player()
+            executor.unmake_move(undo)
+            assert snapshot(game_state) == before
+            assert_hash_is_fresh(game_state)
+            continue
+        if not moves:
+            break
+
+        before = snapshot(game_state)
+        try:
+            undo = executor.make_move(*decode_move(rng.choice(moves), size))
+        except IndexError:
+            # A piece pushed off the board is rolled back at once
+            assert snapshot(game_state) == before
+            continue
+        assert_hash_is_fresh(game_state)
+        game_state.switch_player()
+        stack.append((undo, before))
+
+    while stack:
+        undo, before = stack.pop()
+        game_state.switch_player()
+        executor.unmake_move(undo)
+        assert snapshot(game_state) == before
+        assert_hash_is_fresh(game_state)
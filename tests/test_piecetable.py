@@ -0,0 +1,45 @@
+"""The piece table must describe every piece as a scan of the board would"""
+
+import random
+
+import pytest
+
+from benchmark import scaled_setup
+from engine import playable_moves
+from gameBoard import BoardReader, GameState
+from movegen import decode_move
+
+GAMES = 20
+MAX_MOVES = 40
+
+
+def assert_table_matches_board(game_state):
+    table = game_state.bits.table
+    width = game_state.width
+    cells = [value for cells in game_state.board for value in cells]
+    anchors = {idx: value for idx, value in enumerate(cells) if value in 'abcdABCD'}
+    assert table.anchors == anchors
+    for anchor, piece in anchors.items():
+        extensions = [idx for idx, value in enumerate(cells) if value == str(anchor)]
+        assert table.footprint(anchor) == [anchor] + extensions
+        assert table.team(anchor) == ('light' if piece in 'abcd' else 'dark')
+        lying = (anchor % width + 1 < width and anchor + 1 in extensions) or anchor + width in extensions
+        assert table.orientation(anchor) == ('lying' if lying else 'upright')
+
+
+@pytest.mark.parametrize('seed', range(GAMES))
+def test_table_matches_board(seed):
+    rng = random.Random(seed)
+    size = rng.choice([10, 12, 16])
+    game_state = GameState(size, size)
+    BoardReader(game_state).read_board(scaled_setup(size, size, pieces=rng.randint(2, 6), seed=seed))
+    assert_table_matches_board(game_state)
+    assert game_state.bits.table.team(-1) is None
+
+    for _ in range(MAX_MOVES):
+        moves = playable_moves(game_state)
+        if not moves or game_state.check_win_condition():
+            break
+        game_state.executor.execute_move(*decode_move(rng.choice(moves), size))
+        assert_table_matches_board(game_state)
+        game_state.switch_player()
@@ -0,0 +1,132 @@
+"""The game server over a local socket: sessions, moves, board updates and cleanup"""
+
+import asyncio
+
+from server import GameServer
+
+SETUP = ["new 10 10", "s 1 9 0", "l a 6 3", "d a 6 6", "#"]
+TIMEOUT = 5
+
+
+async def connect(port, lines):
+    """Open a connection and send lines"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(''.join(f"{line}\n" for line in lines).encode())
+    await writer.drain()
+    return reader, writer
+
+
+async def read_until(reader, prefixes):
+    """Read lines up to and including the first starting with one of prefixes; return it"""
+    while True:
+        line = (await asyncio.wait_for(reader.readline(), TIMEOUT)).decode()
+        assert line, "connection closed early"
+        if line.startswith(prefixes):
+            return line.rstrip('\n')
+
+
+async def wait_for_cleanup(game_server):
+    """Wait until the server has dropped every session"""
+    for _ in range(100):
+        if not game_server.sessions:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("sessions left open")
+
+
+async def start():
+    """Start a GameServer on a free port; return it, the asyncio server and the port"""
+    game_server = GameServer()
+    server = await game_server.start()
+    return game_server, server, server.sockets[0].getsockname()[1]
+
+
+def test_game_over_socket():
+    async def run():
+        game_server, server, port = await start()
+        light = await connect(port, SETUP)
+        assert await read_until(light[0], 'game') == "game 1 light"
+        dark = await connect(port, ["join 1"])
+        assert await read_until(dark[0], 'game') == "game 1 dark"
+        spectator = await connect(port, ["join 1"])
+        assert await read_until(spectator[0], 'game') == "game 1 spectator"
+
+        # Every connection is sent the board after a move
+        light[1].write(b"6 3 r\n")
+        for reader, _ in (light, dark, spectator):
+            assert await read_until(reader, 'Next player') == "Next player: dark"
+
+        # Errors go only to the connection that caused them
+        light[1].write(b"9 4 l\n")
+        assert await read_until(light[0], 'ERROR') == "ERROR: Not your turn"
+        dark[1].write(b"0 0 l\n")
+        assert await read_until(dark[0], 'ERROR') == "ERROR: No valid piece at position"
+
+        # The first move settled the board, so the dark piece now rests on the floor
+        dark[1].write(b"9 6 l\n")
+        for reader, _ in (light, dark, spectator):
+            assert await read_until(reader, 'Next player') == "Next player: light"
+        assert game_server.sessions[1].game_state.board[9][5] == 'A'
+
+        for _, writer in (light, dark, spectator):
+            writer.close()
+        await wait_for_cleanup(game_server)
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_sessions_are_independent():
+    async def run():
+        game_server, server, port = await start()
+        first = await connect(port, SETUP)
+        second = await connect(port, SETUP)
+        assert await read_until(first[0], 'game') == "game 1 light"
+        assert await read_until(second[0], 'game') == "game 2 light"
+        first_dark = await connect(port, ["join 1"])
+        await read_until(first_dark[0], 'game')
+
+        first[1].write(b"6 3 r\n")
+        assert await read_until(first[0], 'Next player') == "Next player: dark"
+        assert game_server.sessions[2].game_state.board[6][3] == 'a'
+
+        # Closing one game's connections leaves the other game running
+        first[1].close()
+        first_dark[1].close()
+        for _ in range(100):
+            if 1 not in game_server.sessions:
+                break
+            await asyncio.sleep(0.01)
+        assert list(game_server.sessions) == [2]
+
+        second[1].close()
+        await wait_for_cleanup(game_server)
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_bad_openings_are_refused():
+    async def run():
+        game_server, server, port = await start()
+        cases = [
+            (["join 7"], "ERROR: No such game"),
+            (["hello"], "ERROR: Expected 'new <height> <width>' or 'join <game>'"),
+            (["new 4 4", "#"], "ERROR: Invalid board"),
+            (["new 10 10", "s 1 5 5", "#"], "ERROR: Invalid board"),
+            # Blank lines are accepted, but not more setup lines than the board has cells
+            (["new 8 8"] + [""] * 70 + ["#"], "ERROR: Invalid board"),
+        ]
+        for lines, error in cases:
+            reader, writer = await connect(port, lines)
+            assert await read_until(reader, 'ERROR') == error
+            # The server closes a refused connection
+            assert await asyncio.wait_for(reader.read(), TIMEOUT) == b''
+            writer.close()
+        assert not game_server.sessions
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
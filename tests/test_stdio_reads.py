@@ -0,0 +1,46 @@
+"""A failed token read must leave standard input as it found it"""
+
+import io
+
+import pytest
+
+import stdio
+
+
+@pytest.fixture
+def stdin(monkeypatch):
+    """Replace standard input with the given text"""
+    def feed(text, chunk_size=stdio._CHUNK_SIZE):
+        monkeypatch.setattr(stdio, '_CHUNK_SIZE', chunk_size)
+        monkeypatch.setattr('sys.stdin', io.StringIO(text))
+        stdio._reset()
+    yield feed
+    stdio._reset()
+
+
+@pytest.mark.parametrize('read', [stdio.readInt, stdio.readFloat, stdio.readBool])
+def test_failed_read_consumes_nothing(stdin, read):
+    stdin("  abc\n")
+    with pytest.raises(ValueError):
+        read()
+    assert stdio.readLine() == "  abc"
+
+
+def test_reads_resume_after_a_failure(stdin):
+    stdin("  12 \t x 3.5\n")
+    assert stdio.readInt() == 12
+    with pytest.raises(ValueError):
+        stdio.readInt()
+    assert stdio.readString() == "x"
+    assert stdio.readFloat() == 3.5
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7])
+def test_failure_across_chunks(stdin, chunk_size):
+    # Small chunks make the buffer drop consumed text while a token is read
+    stdin("first line\n" + " " * 10 + "word 7\n", chunk_size)
+    assert stdio.readLine() == "first line"
+    with pytest.raises(ValueError):
+        stdio.readInt()
+    assert stdio.readLine() == " " * 10 + "word 7"
+    assert not stdio.hasNextLine()
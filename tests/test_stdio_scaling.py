@@ -0,0 +1,43 @@
+"""Reading standard input must take time linear in its size"""
+
+import subprocess
+import sys
+
+from conftest import GAME_DIR
+
+SIZES_MB = (4, 32)
+
+# Times only the read, so interpreter start-up does not hide the growth
+READ = """
+import sys, time, stdio
+start = time.perf_counter()
+stdio.{function}()
+print(time.perf_counter() - start)
+"""
+
+
+def read_time(function, data, repeat=3):
+    """Best seconds for one call of stdio.function on data in a fresh interpreter"""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', READ.format(function=function)],
+                                input=data, cwd=GAME_DIR, capture_output=True, check=True).stdout
+        elapsed = float(output)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def growth(function, make_data):
+    small, large = (read_time(function, make_data(mb << 20)) for mb in SIZES_MB)
+    return large / small
+
+
+def test_read_all_is_linear():
+    # 8x the input; quadratic reads grow about 64x
+    ratio = growth('readAll', lambda size: (b'x' * 99 + b'\n') * (size // 100))
+    assert ratio < 20, ratio
+
+
+def test_read_long_line_is_linear():
+    ratio = growth('readLine', lambda size: b'x' * size)
+    assert ratio < 20, ratio